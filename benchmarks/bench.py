@@ -0,0 +1,141 @@
+"""分析流程基准测试 - 解析、分类、CSV 导出的耗时和峰值内存
+
+    python benchmarks/bench.py                          # 默认规模，打印结果
+    python benchmarks/bench.py --save                   # 同时写入基线文件
+    python benchmarks/bench.py --compare --check        # 与基线比较并校验各后端输出一致
+
+与基线相比任一耗时或峰值内存超过 --tolerance 倍时以状态码 1 退出。
+"""
+import argparse
+import gc
+import json
+from pathlib import Path
+import platform
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from synthetic import generate_export  # noqa: E402
+from vocab_core import (  # noqa: E402
+    MIN_ACCURACY_RANGE, ResultStore, ThresholdResults, build_history, classify_entries, export_bytes, parse_text,
+    parse_text_parallel,
+)
+
+DEFAULT_SIZES = (10, 100, 1000, 10000, 100000)
+BASELINE_PATH = Path(__file__).resolve().parent / "baseline.json"
+MIN_COMPARABLE_SECONDS = 0.005  # 更短的耗时噪声太大，不参与回归判断
+
+def best_time(func, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def peak_memory(func):
+    gc.collect()
+    tracemalloc.start()
+    try:
+        func()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+def check_backends(text, min_accuracy):
+    """列式存储、预计算的各分数线结果和多进程解析必须与串行 list-of-dicts 结果完全一致"""
+    parsed = parse_text(text)
+    expected = classify_entries(parsed, min_accuracy, True)
+    if ResultStore.from_parsed(parsed).to_results(min_accuracy, True) != expected:
+        raise AssertionError("ResultStore.to_results 与 classify_entries 结果不一致")
+    outcomes = ThresholdResults(ResultStore.from_parsed(parsed))
+    low, high = MIN_ACCURACY_RANGE
+    for threshold in range(low, high + 1):
+        if outcomes.results(threshold, True) != classify_entries(parsed, threshold, True):
+            raise AssertionError(f"ThresholdResults 在分数线 {threshold}% 时与 classify_entries 结果不一致")
+    parallel_parsed, history = parse_text_parallel(text, max_workers=2, min_entries=1)
+    if classify_entries(parallel_parsed, min_accuracy, True, history) != expected:
+        raise AssertionError("parse_text_parallel 与 parse_text 结果不一致")
+
+def bench_size(students, repeat, min_accuracy):
+    text = generate_export(students)
+    parsed = parse_text(text)
+    history = build_history(parsed)
+    results = classify_entries(parsed, min_accuracy, True, history)
+    # 大规模只跑一次，避免基准本身耗时过长
+    repeat = repeat if students < 10000 else 1
+
+    return {
+        "students": students,
+        "input_bytes": len(text.encode("utf-8")),
+        "tests": sum(len(tests) for _, tests, _ in parsed),
+        "cards": sum(len(cards) for _, _, cards in parsed),
+        "parse_s": best_time(lambda: parse_text(text), repeat),
+        "classify_s": best_time(lambda: classify_entries(parsed, min_accuracy, True, history), repeat),
+        "export_csv_s": best_time(lambda: export_bytes(results, "csv"), repeat),
+        "peak_bytes": peak_memory(lambda: classify_entries(parse_text(text), min_accuracy, True)),
+    }
+
+def compare(rows, baseline, tolerance):
+    """打印与基线的耗时比值，返回是否有回归"""
+    previous = {row["students"]: row for row in baseline.get("results", [])}
+    regressed = False
+    for row in rows:
+        old = previous.get(row["students"])
+        if old is None:
+            continue
+        for metric in ("parse_s", "classify_s", "export_csv_s", "peak_bytes"):
+            if not old.get(metric) or (metric.endswith("_s") and old[metric] < MIN_COMPARABLE_SECONDS):
+                continue
+            ratio = row[metric] / old[metric]
+            flag = ""
+            if ratio > tolerance:
+                flag = "  <-- 回归"
+                regressed = True
+            print(f"{row['students']:>7} {metric:<13} {ratio:6.2f}x{flag}")
+    return regressed
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="词测分析基准测试")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="学生数规模")
+    parser.add_argument("--repeat", type=int, default=3, help="每项取最快的一次")
+    parser.add_argument("--min-accuracy", type=int, default=94)
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PATH)
+    parser.add_argument("--save", action="store_true", help="把本次结果写入基线文件")
+    parser.add_argument("--compare", action="store_true", help="与基线文件比较")
+    parser.add_argument("--tolerance", type=float, default=1.5, help="允许的耗时/内存增长倍数")
+    parser.add_argument("--check", action="store_true", help="校验列式存储、各分数线预计算和多进程解析的输出")
+    args = parser.parse_args(argv)
+
+    rows = []
+    print(f"{'学生数':>7} {'输入':>10} {'解析':>9} {'分类':>9} {'导出CSV':>9} {'峰值内存':>10}")
+    for students in args.sizes:
+        if args.check:
+            check_backends(generate_export(students), args.min_accuracy)
+        row = bench_size(students, args.repeat, args.min_accuracy)
+        rows.append(row)
+        print(f"{students:>7} {row['input_bytes'] / 1e6:>8.2f}MB {row['parse_s']:>8.3f}s {row['classify_s']:>8.3f}s "
+              f"{row['export_csv_s']:>8.3f}s {row['peak_bytes'] / 1e6:>8.1f}MB")
+
+    regressed = False
+    if args.compare:
+        if args.baseline.exists():
+            regressed = compare(rows, json.loads(args.baseline.read_text(encoding="utf-8")), args.tolerance)
+        else:
+            print(f"没有基线文件 {args.baseline}", file=sys.stderr)
+
+    if args.save:
+        args.baseline.write_text(json.dumps({
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "results": rows,
+        }, ensure_ascii=False, indent=2), encoding="utf-8")
+        print(f"基线已保存到 {args.baseline}")
+
+    return 1 if regressed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,67 @@
+"""分析核心冷启动基准 - 在全新子进程里计时 import vocab_core
+
+    python benchmarks/import_time.py                    # 打印中位数耗时和常驻内存
+    python benchmarks/import_time.py --budget-ms 60     # 超出预算时以状态码 1 退出
+    python benchmarks/import_time.py --streamlit        # 同时测 import streamlit 作对照
+
+vocab_core 加载时若带进了 Streamlit、pandas、NumPy 或 pyarrow 也以状态码 1 退出。
+"""
+import argparse
+import json
+from pathlib import Path
+import statistics
+import subprocess
+import sys
+
+ROOT = Path(__file__).resolve().parent.parent
+HEAVY_MODULES = ("streamlit", "pandas", "numpy", "pyarrow", "openpyxl", "sqlite3", "multiprocessing")
+
+# 子进程里执行：计时一次导入并报告常驻内存和已加载的重量级模块
+PROBE = """
+import json, resource, sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+print(json.dumps({{
+    "seconds": elapsed,
+    "maxrss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+    "heavy": sorted(name for name in {heavy!r} if name in sys.modules),
+}}))
+"""
+
+def measure(module, runs):
+    """每次都起新的解释器，返回 (耗时中位数秒, 常驻内存中位数 KB, 带进来的重量级模块)"""
+    code = PROBE.format(module=module, heavy=HEAVY_MODULES)
+    samples = []
+    for _ in range(runs):
+        out = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, check=True)
+        samples.append(json.loads(out.stdout))
+    return (
+        statistics.median(s["seconds"] for s in samples),
+        statistics.median(s["maxrss_kb"] for s in samples),
+        samples[0]["heavy"],
+    )
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="分析核心冷启动基准")
+    parser.add_argument("--runs", type=int, default=9, help="子进程次数，取中位数")
+    parser.add_argument("--budget-ms", type=float, help="import vocab_core 的耗时上限（毫秒）")
+    parser.add_argument("--streamlit", action="store_true", help="同时测 import streamlit 作对照")
+    args = parser.parse_args(argv)
+
+    modules = ["vocab_core"] + (["streamlit"] if args.streamlit else [])
+    failed = False
+    for module in modules:
+        seconds, maxrss_kb, heavy = measure(module, args.runs)
+        print(f"{module:<12} {seconds * 1000:8.1f}ms {maxrss_kb / 1024:8.1f}MB")
+        if module == "vocab_core":
+            if heavy:
+                print(f"vocab_core 加载时导入了 {', '.join(heavy)}", file=sys.stderr)
+                failed = True
+            if args.budget_ms is not None and seconds * 1000 > args.budget_ms:
+                print(f"import vocab_core 超出预算 {args.budget_ms:g}ms", file=sys.stderr)
+                failed = True
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
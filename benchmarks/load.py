@@ -0,0 +1,266 @@
+"""多会话并发压测 - 启动无界面的 Streamlit 服务，用 N 个 websocket 会话模拟老师同时使用
+
+    python benchmarks/load.py --sessions 8 --waves 3 --students 500
+    python benchmarks/load.py --sessions 16 --distinct --output load.json
+
+AppTest 每次运行都会创建并销毁进程内唯一的 Runtime，不能在一个进程里并发，所以这里
+像浏览器一样连到 /_stcore/stream，收发 BackMsg / ForwardMsg。每一轮所有会话并发执行：
+粘贴导出数据并开始分析 -> 翻到第 2 页 -> 生成 CSV，每步计时到 script_finished 为止。
+报告各步骤延迟分位数、服务进程的峰值 RSS、每会话占用的内存，以及每轮之后的 RSS
+（会话只保留最近一次分析，持续增长说明会话间有泄漏）。解析进程池的子进程不计入。
+正式开始前先用一个预热会话跑一轮（数据与正式会话不同），每会话内存从预热之后的 RSS 算起，
+不计应用导入、NumPy/pyarrow 等延迟导入和进程级缓存这些一次性开销。
+"""
+import argparse
+import asyncio
+import json
+from pathlib import Path
+import platform
+import socket
+import statistics
+import subprocess
+import sys
+import time
+from urllib.request import urlopen
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from synthetic import generate_export  # noqa: E402
+
+APP_PATH = ROOT / "vocab-analyzer.py"
+PERCENTILES = (50, 90, 99)
+STEPS = ("load", "analyze", "page", "export")
+INPUT_LABEL = "请粘贴如下格式的数据:"
+ANALYZE_LABEL = "🔍 开始分析"
+EXPORT_LABEL = "⚙️ 生成导出文件"
+PAGE_LABEL = "页码"
+MAX_MESSAGE_SIZE = 200 * 1024 * 1024  # 与 server.maxMessageSize 的默认值一致
+WARM_UP_SETTLE_S = 1.0  # 预热会话关闭后等服务端清理会话再取 RSS
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def process_memory(pid):
+    """服务进程的 (当前 RSS, 峰值 RSS)，单位字节，只在 Linux 上可用"""
+    memory = {}
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                key, _, value = line.partition(":")
+                if key in ("VmRSS", "VmHWM"):
+                    memory[key] = int(value.split()[0]) * 1024
+    except OSError:
+        pass
+    return memory.get("VmRSS"), memory.get("VmHWM")
+
+def summarize(samples):
+    if not samples:
+        return {"count": 0}
+    ordered = sorted(samples)
+    summary = {"count": len(ordered), "mean": statistics.fmean(ordered), "max": ordered[-1]}
+    for q in PERCENTILES:
+        summary[f"p{q}"] = ordered[min(len(ordered) - 1, round(q / 100 * (len(ordered) - 1)))]
+    return {key: round(value, 4) if isinstance(value, float) else value for key, value in summary.items()}
+
+def start_server(port, timeout):
+    """后台启动 streamlit run，等 /_stcore/health 就绪后返回进程"""
+    server = subprocess.Popen(
+        [
+            sys.executable, "-m", "streamlit", "run", str(APP_PATH),
+            "--server.headless", "true",
+            "--server.port", str(port),
+            "--server.address", "127.0.0.1",
+            "--server.fileWatcherType", "none",
+            "--browser.gatherUsageStats", "false",
+        ],
+        cwd=ROOT,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+    )
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError(f"Streamlit 服务启动失败:\n{server.stderr.read().decode(errors='replace')}")
+        try:
+            with urlopen(f"http://127.0.0.1:{port}/_stcore/health", timeout=1) as response:
+                if response.status == 200:
+                    return server
+        except OSError:
+            time.sleep(0.2)
+    server.kill()
+    raise RuntimeError("等待 Streamlit 服务就绪超时")
+
+class Session:
+    """一个模拟会话：一条 websocket 连接，记下页面上的控件 id 和各步骤耗时"""
+
+    def __init__(self, url, timeout):
+        self.url = url
+        self.timeout = timeout
+        self.connection = None
+        self.widgets = {}  # 标签 -> 最近一次渲染的控件 proto
+        self.timings = {step: [] for step in STEPS}
+        self.errors = []
+
+    async def connect(self):
+        from tornado.websocket import websocket_connect
+
+        self.connection = await websocket_connect(self.url, max_message_size=MAX_MESSAGE_SIZE)
+
+    def close(self):
+        if self.connection is not None:
+            self.connection.close()
+
+    async def rerun(self, step, *widget_states):
+        """发一次 rerun，读 ForwardMsg 直到脚本跑完"""
+        from streamlit.proto.BackMsg_pb2 import BackMsg
+        from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+
+        msg = BackMsg()
+        msg.rerun_script.widget_states.widgets.extend(widget_states)
+        started = time.perf_counter()
+        await self.connection.write_message(msg.SerializeToString(), binary=True)
+        while True:
+            payload = await asyncio.wait_for(self.connection.read_message(), self.timeout)
+            if payload is None:
+                raise ConnectionError("服务端关闭了连接")
+            forward = ForwardMsg()
+            forward.ParseFromString(payload)
+            kind = forward.WhichOneof("type")
+            if kind == "delta" and forward.delta.WhichOneof("type") == "new_element":
+                self.record(step, forward.delta.new_element)
+            elif kind == "script_finished" and forward.script_finished != ForwardMsg.FINISHED_EARLY_FOR_RERUN:
+                break
+        self.timings[step].append(time.perf_counter() - started)
+
+    def record(self, step, element):
+        kind = element.WhichOneof("type")
+        if kind == "exception":
+            self.errors.append(f"{step}: {element.exception.type}: {element.exception.message}")
+        elif kind in ("button", "text_area", "number_input"):
+            widget = getattr(element, kind)
+            self.widgets[widget.label] = widget
+
+    def widget(self, label):
+        try:
+            return self.widgets[label]
+        except KeyError:
+            raise LookupError(f"页面上没有找到控件: {label}") from None
+
+    async def load(self):
+        await self.connect()
+        await self.rerun("load")
+
+    async def round(self, text):
+        from streamlit.proto.WidgetStates_pb2 import WidgetState
+
+        try:
+            # 没有发送的控件保持上一次的值，所以翻页和导出时不用重发粘贴的文本
+            await self.rerun(
+                "analyze",
+                WidgetState(id=self.widget(INPUT_LABEL).id, string_value=text),
+                WidgetState(id=self.widget(ANALYZE_LABEL).id, trigger_value=True),
+            )
+            page = self.widget(PAGE_LABEL)
+            if page.max > 1:
+                await self.rerun("page", WidgetState(id=page.id, int_value=2))
+            await self.rerun("export", WidgetState(id=self.widget(EXPORT_LABEL).id, trigger_value=True))
+        except (LookupError, ConnectionError, asyncio.TimeoutError) as e:
+            self.errors.append(f"{type(e).__name__}: {e}")
+
+async def warm_up(args, server, url):
+    """跑一个不计时的会话，返回它关闭后的服务 RSS"""
+    session = Session(url, args.timeout)
+    try:
+        await session.load()
+        await session.round(generate_export(args.students, seed=args.sessions * args.waves + 1))
+    finally:
+        session.close()
+    if session.errors:
+        raise RuntimeError(f"预热会话出错: {session.errors}")
+    await asyncio.sleep(WARM_UP_SETTLE_S)
+    rss, _ = process_memory(server.pid)
+    return rss
+
+async def run_load(args, server, url):
+    sessions = [Session(url, args.timeout) for _ in range(args.sessions)]
+    memory = {"warm_rss": None, "loaded_rss": None, "rss_after_wave": []}
+    try:
+        memory["warm_rss"] = await warm_up(args, server, url)
+        await asyncio.gather(*(session.load() for session in sessions))
+        memory["loaded_rss"], _ = process_memory(server.pid)
+        for wave in range(args.waves):
+            texts = [
+                generate_export(args.students, seed=wave * args.sessions + i if args.distinct else 0)
+                for i in range(args.sessions)
+            ]
+            await asyncio.gather(*(session.round(text) for session, text in zip(sessions, texts)))
+            rss, _ = process_memory(server.pid)
+            memory["rss_after_wave"].append(rss)
+            print(f"第 {wave + 1}/{args.waves} 轮完成，服务 RSS {(rss or 0) / 1e6:.1f}MB", file=sys.stderr)
+    finally:
+        for session in sessions:
+            session.close()
+    return sessions, memory
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="多会话并发压测")
+    parser.add_argument("--sessions", type=int, default=4, help="并发会话数")
+    parser.add_argument("--waves", type=int, default=3, help="每个会话重复的轮数")
+    parser.add_argument("--students", type=int, default=300, help="每份导出的学生数")
+    parser.add_argument("--distinct", action="store_true", help="每个会话每轮粘贴不同的数据（默认所有会话相同，会命中共享缓存）")
+    parser.add_argument("--timeout", type=float, default=300, help="单次 rerun 的超时（秒）")
+    parser.add_argument("--port", type=int, help="服务端口，默认随机选一个空闲端口")
+    parser.add_argument("--output", type=Path, help="把 JSON 报告写到文件，默认打印到标准输出")
+    args = parser.parse_args(argv)
+
+    port = args.port or free_port()
+    server = start_server(port, args.timeout)
+    try:
+        baseline_rss, _ = process_memory(server.pid)
+        started = time.perf_counter()
+        sessions, memory = asyncio.run(run_load(args, server, f"ws://127.0.0.1:{port}/_stcore/stream"))
+        elapsed = time.perf_counter() - started
+        _, peak_rss = process_memory(server.pid)
+    finally:
+        server.terminate()
+        server.wait(10)
+
+    wave_rss = memory["rss_after_wave"]
+    held_rss = wave_rss[-1] if wave_rss else memory["loaded_rss"]
+    warm_rss = memory["warm_rss"]
+    report = {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "config": {key: str(value) if isinstance(value, Path) else value for key, value in vars(args).items()},
+        "elapsed_s": round(elapsed, 3),
+        "latency_s": {
+            step: summarize([sample for session in sessions for sample in session.timings[step]]) for step in STEPS
+        },
+        "memory_bytes": {
+            "baseline_rss": baseline_rss,
+            "warm_rss": warm_rss,
+            "loaded_rss": memory["loaded_rss"],
+            "peak_rss": peak_rss,
+            "rss_after_wave": wave_rss,
+            # 一次性开销已计入 warm_rss，这里只剩每个会话自己持有的内存
+            "held_per_session": None if None in (held_rss, warm_rss)
+            else (held_rss - warm_rss) // max(args.sessions, 1),
+            # 第一轮之后每轮的平均增长；会话数据只保留最近一次分析，稳定后应接近 0
+            "growth_per_wave": None if len(wave_rss) < 2 or None in wave_rss
+            else (wave_rss[-1] - wave_rss[0]) // (len(wave_rss) - 1),
+        },
+        "errors": [error for session in sessions for error in session.errors],
+    }
+
+    data = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        args.output.write_text(data, encoding="utf-8")
+    else:
+        print(data)
+    return 1 if report["errors"] else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,58 @@
+"""生成仿 Study 系统“班级学习动态”的合成数据，供基准测试使用
+
+同一 (学生数, seed) 总是生成相同的文本:
+    python benchmarks/synthetic.py 1000 > export.txt
+"""
+import random
+import sys
+
+SURNAMES = "王李张刘陈杨黄赵吴周徐孙马朱胡郭何高林罗"
+GIVEN = "子涵宇轩欣怡梓萱浩然一诺思远雨桐俊杰佳琪明哲晓彤嘉怡博文若曦天佑语嫣"
+WORD_LISTS = ("托福核心-英义-所有义", "托福核心-中义", "SAT核心-英义-所有义")
+CARD_NAMES = ("Reading Test {}", "Listening Practice {}", "Grammar Drill {}")
+
+def vocab_record(rng, word_list, mode, start, accuracy):
+    words = 100
+    errors = round(words * (100 - accuracy) / 100)
+    return (f"【词测 {word_list}-{mode}-{start}~{start + 99}-{words}】: 已完成 "
+            f"词数：{words}，正确率：{accuracy}%，平均反应时间：{rng.uniform(1.5, 6):.2f} s，错误个数：{errors}")
+
+def card_record(rng):
+    card_type = rng.choice(("SAT", "TOEFL"))
+    total = rng.choice((10, 15, 20, 27))
+    wrong = rng.randint(0, total // 2)
+    status = "已完成" if rng.random() < 0.85 else "正在进行"
+    record = f"【题卡 [{card_type}] {rng.choice(CARD_NAMES).format(rng.randint(1, 60))}】: {status} 错误个数: {wrong}/{total}"
+    if wrong and rng.random() < 0.5:
+        record += f"，订正后错误个数: {rng.randint(0, wrong)}/{total}"
+    return record
+
+def student_block(rng, name):
+    records = []
+    for _ in range(rng.randint(0, 6)):
+        word_list = rng.choice(WORD_LISTS)
+        mode = rng.choice(("听测", "看测"))
+        start = 1 + 100 * rng.randint(0, 39)
+        if rng.random() < 0.1:
+            records.append(f"【词测 {word_list}-{mode}-{start}~{start + 99}-100】: 正在进行")
+            continue
+        # 约三成的范围先失败若干次再通过
+        if rng.random() < 0.3:
+            for _ in range(rng.randint(1, 3)):
+                records.append(vocab_record(rng, word_list, mode, start, rng.randint(70, 93)))
+        records.append(vocab_record(rng, word_list, mode, start, rng.randint(94, 100)))
+    for _ in range(rng.randint(0, 3)):
+        records.append(card_record(rng))
+    rng.shuffle(records)
+    return f"{name}同学 : " + ", ".join(records)
+
+def student_name(rng):
+    return rng.choice(SURNAMES) + "".join(rng.choice(GIVEN) for _ in range(rng.randint(1, 2)))
+
+def generate_export(students, seed=0):
+    """生成 students 个学生块的粘贴文本"""
+    rng = random.Random(seed)
+    return "\n\n".join(student_block(rng, student_name(rng)) for _ in range(students))
+
+if __name__ == "__main__":
+    sys.stdout.write(generate_export(int(sys.argv[1]), int(sys.argv[2]) if len(sys.argv) > 2 else 0))
@@ -0,0 +1,8 @@
+"""让测试能直接导入仓库根目录的模块和 benchmarks/synthetic.py"""
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+for path in (ROOT, ROOT / "benchmarks"):
+    if str(path) not in sys.path:
+        sys.path.insert(0, str(path))
@@ -0,0 +1,53 @@
+"""命令行版：--merge 与 --history-db 的重试次数统计"""
+import json
+
+import pytest
+
+from synthetic import generate_export
+from vocab_cli import main
+
+ATTEMPT = "孙八:【词测 托福核心-英义-所有义-听测-2601~2700-100】: 已完成 词数：100，正确率：{}%，平均反应时间：2.00 s，错误个数：{}"
+
+def read_jsonl(path):
+    return [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+
+def stars(records):
+    return sorted(
+        (record["file"].rsplit("/", 1)[-1], record["name"], test["range"], test["accuracy_str"])
+        for record in records for test in record["passed"] + record["failed"]
+    )
+
+def run(tmp_path, files, *options):
+    output = tmp_path / f"out{len(list(tmp_path.glob('out*')))}.jsonl"
+    assert main([*map(str, files), "--show-failed", "-j", "1", "-o", str(output), *options]) == 0
+    return read_jsonl(output)
+
+@pytest.fixture
+def daily_files(tmp_path):
+    first = tmp_path / "d1.txt"
+    second = tmp_path / "d2.txt"
+    first.write_text(ATTEMPT.format(96, 4), encoding="utf-8")
+    second.write_text(ATTEMPT.format(80, 20), encoding="utf-8")
+    return [first, second]
+
+def test_merge_counts_retries_across_files(tmp_path, daily_files):
+    assert [test["accuracy_str"] for record in run(tmp_path, daily_files, "--merge")
+            for test in record["passed"] + record["failed"]] == ["96%*", "80%"]
+
+def test_merge_with_fresh_history_db_matches_merge(tmp_path, daily_files):
+    merged = run(tmp_path, daily_files, "--merge")
+    with_db = run(tmp_path, daily_files, "--merge", "--history-db", str(tmp_path / "history.db"))
+    assert stars(with_db) == stars(merged)
+
+def test_history_db_is_order_independent(tmp_path):
+    files = []
+    for day in range(4):
+        path = tmp_path / f"day{day}.txt"
+        path.write_text(generate_export(15, seed=day % 2), encoding="utf-8")
+        files.append(path)
+    forward = run(tmp_path, files, "--merge", "--history-db", str(tmp_path / "forward.db"))
+    backward = run(tmp_path, files[::-1], "--history-db", str(tmp_path / "backward.db"))
+    assert stars(forward) == stars(backward)
+    # day2、day3 与 day0、day1 内容相同，重复导入的记录在历史库中只算一次
+    deduplicated = run(tmp_path, files[:2], "--merge")
+    assert [row for row in stars(forward) if row[0] in ("day0.txt", "day1.txt")] == stars(deduplicated)
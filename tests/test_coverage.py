@@ -0,0 +1,120 @@
+"""覆盖范围：区间合并、CoverageIndex 的查询和导出行与逐个单词的集合运算一致"""
+import csv
+import io
+import random
+
+import pytest
+
+from vocab_core import (
+    COVERAGE_COLUMNS,
+    CoverageIndex,
+    iter_coverage_rows,
+    merge_intervals,
+    parse_range,
+    write_coverage_csv,
+)
+
+def runs(words):
+    """把单词编号集合切成连续的闭区间"""
+    intervals = []
+    for word in sorted(words):
+        if intervals and word == intervals[-1][1] + 1:
+            intervals[-1][1] = word
+        else:
+            intervals.append([word, word])
+    return [tuple(interval) for interval in intervals]
+
+def words_of(intervals):
+    return {word for start, end in intervals for word in range(start, end + 1)}
+
+def random_intervals(rng, count, limit=120):
+    intervals = []
+    for _ in range(count):
+        start = rng.randint(1, limit)
+        intervals.append((start, start + rng.randint(0, 15)))
+    return intervals
+
+@pytest.mark.parametrize("text, expected", [
+    ("2601~2700", (2601, 2700)),
+    ("7", (7, 7)),
+    ("200~101", (101, 200)),
+    ("未知范围", None),
+    ("a~5", None),
+])
+def test_parse_range(text, expected):
+    assert parse_range(text) == expected
+
+@pytest.mark.parametrize("seed", range(200))
+def test_merge_intervals_matches_word_sets(seed):
+    rng = random.Random(seed)
+    intervals = random_intervals(rng, rng.randint(0, 12))
+    assert merge_intervals(intervals) == runs(words_of(intervals))
+
+@pytest.mark.parametrize("seed", range(100))
+def test_coverage_queries_match_word_sets(seed):
+    rng = random.Random(seed)
+    keys = [("张三", "托福核心-中义", "听测"), ("张三", "SAT核心-英义-所有义", "听测"), ("李四", "托福核心-中义", "看测")]
+    raw = {key: random_intervals(rng, rng.randint(1, 10)) for key in keys}
+    index = CoverageIndex(raw)
+    assert index.keys() == keys
+    assert index.max_end == max(end for intervals in raw.values() for _, end in intervals)
+    missing_key = ("王五", "托福核心-中义", "听测")
+    for key in keys + [missing_key]:
+        covered = words_of(raw.get(key, ()))
+        assert index.coverage(key) == runs(covered)
+        for _ in range(30):
+            start = rng.randint(-5, 150)
+            end = start + rng.randint(0, 60)
+            target = set(range(start, end + 1))
+            assert index.overlap(key, start, end) == runs(covered & target)
+            assert index.covered_words(key, start, end) == len(covered & target)
+            gaps = runs(target - covered)
+            assert index.first_gap(key, start, end) == (gaps[0] if gaps else None)
+
+def passed(word_list, test_type, test_range):
+    return {"word_list": word_list, "type": test_type, "range": test_range}
+
+def test_results_rows_and_csv():
+    results = [
+        {"name": "张三", "passed": [passed("托福核心-中义", "听测", "1~100"), passed("SAT核心", "听测", "101~200"),
+                                   passed("托福核心-中义", "听测", "未知范围")],
+         "failed": [passed("托福核心-中义", "听测", "201~300")]},
+        {"name": "李四", "passed": [passed("托福核心-中义", "看测", "1~100")], "failed": []},
+        # 同一学生的另一个学生块：与前一段首尾相接，合并为一个区间
+        {"name": "张三", "passed": [passed("托福核心-中义", "听测", "101~200"), passed("托福核心-中义", "听测", "301")],
+         "failed": []},
+    ]
+    rows = list(iter_coverage_rows(results))
+    assert rows == [
+        ("张三", "托福核心-中义", "听测", 1, 200, 200),
+        ("张三", "托福核心-中义", "听测", 301, 301, 1),
+        ("张三", "SAT核心", "听测", 101, 200, 100),
+        ("李四", "托福核心-中义", "看测", 1, 100, 100),
+    ]
+    index = CoverageIndex.from_results(results)
+    assert index.first_gap(("张三", "托福核心-中义", "听测"), 1, 400) == (201, 300)
+    assert index.word_lists() == ["SAT核心", "托福核心-中义"]
+
+    buffer = io.BytesIO()
+    write_coverage_csv(results, buffer)
+    table = list(csv.reader(io.StringIO(buffer.getvalue().decode("utf-8-sig"))))
+    assert tuple(table[0]) == COVERAGE_COLUMNS
+    assert [tuple(row) for row in table[1:]] == [tuple(map(str, row)) for row in rows]
+
+@pytest.mark.parametrize("seed", range(20))
+def test_rows_match_word_sets(seed):
+    rng = random.Random(seed)
+    results = []
+    expected = {}
+    for _ in range(rng.randint(1, 8)):
+        name = rng.choice(("张三", "李四"))
+        tests = []
+        for _ in range(rng.randint(0, 5)):
+            key = (name, rng.choice(("托福核心-中义", "SAT核心")), rng.choice(("听测", "看测")))
+            start, end = random_intervals(rng, 1)[0]
+            tests.append(passed(key[1], key[2], f"{start}~{end}"))
+            expected.setdefault(key, set()).update(range(start, end + 1))
+        results.append({"name": name, "passed": tests, "failed": []})
+    rows = sorted(iter_coverage_rows(results))
+    assert rows == sorted(key + (start, end, end - start + 1) for key, words in expected.items()
+                          for start, end in runs(words))
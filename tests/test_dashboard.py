@@ -0,0 +1,160 @@
+"""班级看板的汇总与逐条记录的纯 Python / np.percentile 计算一致"""
+from collections import defaultdict
+
+import numpy as np
+import pytest
+
+from synthetic import generate_export
+from test_equivalence import CASES
+from vocab_core import (
+    ACCURACY_PERCENTILES,
+    CARD_TYPES,
+    MIN_ACCURACY_RANGE,
+    TEST_TYPES,
+    TIME_PERCENTILES,
+    ResultStore,
+    group_percentiles,
+    parse_text,
+    range_sort_key,
+    rounded,
+)
+
+TEXTS = dict(CASES, 合成=generate_export(200, seed=12))
+
+def approx_rows(rows):
+    # 均值按列累加，与逐条相加的浮点误差可能让一位小数的舍入差 0.1
+    return pytest.approx(rows, abs=0.1 + 1e-9)
+
+def attempts_of(parsed):
+    return [(name, *test) for name, tests, _ in parsed for test in tests]
+
+def cards_of(parsed):
+    return [(name, card_type, card) for name, _, cards in parsed for card_type, card in cards]
+
+def percentile(values, q, digits=1):
+    return rounded(np.percentile(values, q), digits) if len(values) else None
+
+def expected_range_summary(parsed, min_accuracy):
+    groups = defaultdict(list)
+    for name, test_type, test_range, accuracy, word_count, reaction_time, *_ in attempts_of(parsed):
+        groups[(test_type, test_range)].append((name, accuracy, word_count, reaction_time))
+    rows = []
+    for (test_type, test_range), attempts in groups.items():
+        names = {name for name, *_ in attempts}
+        passed_names = {name for name, accuracy, *_ in attempts if accuracy >= min_accuracy}
+        accuracies = [accuracy for _, accuracy, _, _ in attempts]
+        times = [reaction_time for _, _, word_count, reaction_time in attempts if word_count is not None]
+        row = {
+            "测试类型": test_type,
+            "范围": test_range,
+            "学生数": len(names),
+            "尝试次数": len(attempts),
+            "重试次数": len(attempts) - len(names),
+            "通过率": rounded(sum(a >= min_accuracy for a in accuracies) / len(attempts) * 100),
+            "学生通过率": rounded(len(passed_names) / len(names) * 100),
+            "平均正确率": rounded(sum(accuracies) / len(attempts)),
+        }
+        for q in ACCURACY_PERCENTILES:
+            row[f"正确率P{q}"] = percentile(accuracies, q)
+        for q in TIME_PERCENTILES:
+            row[f"反应时间P{q}"] = percentile(times, q, 2)
+        rows.append(row)
+    rows.sort(key=lambda row: (TEST_TYPES.index(row["测试类型"]), range_sort_key(row["范围"])))
+    return rows
+
+def expected_card_summary(parsed):
+    groups = defaultdict(list)
+    first_seen = {}
+    for _, card_type, card in cards_of(parsed):
+        first_seen.setdefault(card["name"], len(first_seen))
+        groups[(card_type, card["name"])].append(card)
+    rows = []
+    for (card_type, name), cards in sorted(groups.items(), key=lambda item: (
+            CARD_TYPES.index(item[0][0]), first_seen[item[0][1]])):
+        initial = [card["initial_accuracy"] for card in cards]
+        corrected = [card["corrected_accuracy"] for card in cards if card["corrected_wrong"] is not None]
+        rows.append({
+            "题卡类型": card_type,
+            "题卡名称": name,
+            "份数": len(cards),
+            "已完成": sum(card["status"] == "已完成" for card in cards),
+            "平均初次正确率": rounded(sum(initial) / len(cards)),
+            "初次正确率P50": percentile(initial, 50),
+            "订正份数": len(corrected),
+            "平均订正后正确率": rounded(sum(corrected) / len(corrected)) if corrected else None,
+        })
+    return rows
+
+def expected_class_summary(parsed, min_accuracy):
+    tests = attempts_of(parsed)
+    cards = cards_of(parsed)
+    accuracies = [test[3] for test in tests]
+    times = [test[5] for test in tests if test[4] is not None]
+    initial = [card["initial_accuracy"] for _, _, card in cards]
+    corrected = [card["corrected_accuracy"] for _, _, card in cards if card["corrected_wrong"] is not None]
+    return {
+        "学生数": len({name for name, _, _ in parsed}),
+        "词测次数": len(tests),
+        "重试次数": len(tests) - len({test[:3] for test in tests}),
+        "通过率": rounded(sum(a >= min_accuracy for a in accuracies) / len(accuracies) * 100) if accuracies else None,
+        "正确率P50": percentile(accuracies, 50),
+        "反应时间P50": percentile(times, 50, 2),
+        "有未通过词测的学生": len({test[0] for test in tests if test[3] < min_accuracy}),
+        "题卡数": len(cards),
+        "平均初次正确率": rounded(sum(initial) / len(initial)) if initial else None,
+        "平均订正后正确率": rounded(sum(corrected) / len(corrected)) if corrected else None,
+    }
+
+def expected_pass_rate_curve(parsed):
+    tests = attempts_of(parsed)
+    if not tests:
+        return []
+    best = defaultdict(int)
+    for test in tests:
+        best[test[:3]] = max(best[test[:3]], test[3])
+    rows = []
+    low, high = MIN_ACCURACY_RANGE
+    for threshold in range(low, high + 1):
+        rows.append({
+            "分数线": threshold,
+            "通过率": rounded(sum(test[3] >= threshold for test in tests) / len(tests) * 100),
+            "学生通过率": rounded(sum(value >= threshold for value in best.values()) / len(best) * 100),
+            "有未通过词测的学生": len({test[0] for test in tests if test[3] < threshold}),
+        })
+    return rows
+
+@pytest.mark.parametrize("name", TEXTS)
+@pytest.mark.parametrize("min_accuracy", (85, 94, 100))
+def test_summaries_match_reference(name, min_accuracy):
+    parsed = parse_text(TEXTS[name])
+    store = ResultStore.from_parsed(parsed)
+    assert store.range_summary(min_accuracy) == approx_rows(expected_range_summary(parsed, min_accuracy))
+    assert store.card_summary() == approx_rows(expected_card_summary(parsed))
+    assert store.class_summary(min_accuracy) == approx_rows(expected_class_summary(parsed, min_accuracy))
+    assert store.pass_rate_curve() == approx_rows(expected_pass_rate_curve(parsed))
+
+def test_empty_store():
+    store = ResultStore.from_parsed([])
+    assert store.range_summary() == []
+    assert store.card_summary() == []
+    assert store.pass_rate_curve() == []
+    assert store.class_summary() == {
+        "学生数": 0, "词测次数": 0, "重试次数": 0, "通过率": None, "正确率P50": None, "反应时间P50": None,
+        "有未通过词测的学生": 0, "题卡数": 0, "平均初次正确率": None, "平均订正后正确率": None,
+    }
+
+@pytest.mark.parametrize("seed", range(20))
+def test_group_percentiles_matches_numpy(seed):
+    rng = np.random.default_rng(seed)
+    group_count = int(rng.integers(1, 12))
+    groups = rng.integers(0, group_count, size=int(rng.integers(0, 200)))
+    values = rng.integers(0, 101, size=len(groups)) if seed % 2 else rng.random(len(groups)) * 10
+    percentiles = (0, 10, 25, 50, 75, 90, 100)
+    result = group_percentiles(groups, values, group_count, percentiles)
+    assert result.shape == (group_count, len(percentiles))
+    for group in range(group_count):
+        members = values[groups == group]
+        if len(members):
+            assert result[group] == pytest.approx(np.percentile(members, percentiles))
+        else:
+            assert np.isnan(result[group]).all()
@@ -0,0 +1,48 @@
+"""Diagnostics 的 JSON 日志"""
+import io
+import json
+import logging
+
+import pytest
+
+from vocab_core import LOGGER, Diagnostics, configure_logging
+
+@pytest.fixture
+def restore_logger():
+    handlers, level, propagate = list(LOGGER.handlers), LOGGER.level, LOGGER.propagate
+    yield
+    LOGGER.handlers[:] = handlers
+    LOGGER.setLevel(level)
+    LOGGER.propagate = propagate
+
+def sample_diagnostics():
+    diagnostics = Diagnostics()
+    with diagnostics.stage("parse"):
+        diagnostics.counters["students"] += 3
+    return diagnostics
+
+def test_log_emits_one_json_line(caplog):
+    caplog.set_level(logging.INFO, logger=LOGGER.name)
+    sample_diagnostics().log(event="analyze", input_size=10)
+    [record] = [record for record in caplog.records if record.name == LOGGER.name]
+    assert record.levelno == logging.INFO
+    payload = json.loads(record.getMessage())
+    assert payload["event"] == "analyze"
+    assert payload["input_size"] == 10
+    assert payload["counters"] == {"students": 3}
+    assert set(payload["timings"]) == {"parse"}
+
+def test_configured_handler_writes_json_lines(restore_logger):
+    stream = io.StringIO()
+    configure_logging("INFO", stream)
+    configure_logging("INFO", stream)  # 重复配置不会重复输出
+    sample_diagnostics().log(event="analyze")
+    lines = stream.getvalue().splitlines()
+    assert len(lines) == 1
+    assert json.loads(lines[0])["counters"] == {"students": 3}
+
+def test_configured_level_silences_info(restore_logger):
+    stream = io.StringIO()
+    configure_logging("WARNING", stream)
+    sample_diagnostics().log(event="analyze")
+    assert stream.getvalue() == ""
@@ -0,0 +1,69 @@
+"""diff_parsed：每种变化类型，以及追加粘贴时已通过范围上的新失败"""
+import pytest
+
+from synthetic import generate_export
+from vocab_core import DIFF_KINDS, diff_counts, diff_parsed, parse_text
+
+def attempt(accuracy, reaction_time=2.0, test_range="2601~2700"):
+    return (f"【词测 托福核心-中义-听测-{test_range}-100】: 已完成 词数：100，正确率：{accuracy}%，"
+            f"平均反应时间：{reaction_time:.2f} s，错误个数：{100 - accuracy}")
+
+def card(status="已完成", wrong=2, corrected=None):
+    record = f"【题卡 [SAT] Reading Test 3】: {status} 错误个数: {wrong}/20"
+    if corrected is not None:
+        record += f"，订正后错误个数: {corrected}/20"
+    return record
+
+def paste(*records, name="孙八"):
+    return parse_text(f"{name}:" + ",".join(records))
+
+def kinds(before, after, min_accuracy=94):
+    return [(row["变化"], row["项目"]) for row in diff_parsed(before, after, min_accuracy)]
+
+@pytest.mark.parametrize("before, after, expected", [
+    # 词测
+    ((attempt(80),), (attempt(80), attempt(96)), [("新通过", "2601~2700")]),
+    ((), (attempt(96),), [("新通过", "2601~2700")]),
+    ((), (attempt(80),), [("新未通过", "2601~2700")]),
+    ((attempt(80),), (attempt(80), attempt(85)), [("新未通过", "2601~2700")]),
+    ((attempt(96),), (attempt(96), attempt(80)), [("新未通过", "2601~2700")]),
+    ((attempt(80),), (attempt(80), attempt(85), attempt(97)), [("新通过", "2601~2700"), ("新未通过", "2601~2700")]),
+    ((attempt(95),), (attempt(95), attempt(98)), [("成绩提高", "2601~2700")]),
+    ((attempt(95, 3.0),), (attempt(95, 3.0), attempt(95, 2.5)), [("成绩提高", "2601~2700")]),
+    ((attempt(95),), (attempt(95), attempt(94)), []),
+    # 题卡
+    ((card("正在进行"),), (card(),), [("题卡完成", "Reading Test 3")]),
+    ((), (card(),), [("题卡完成", "Reading Test 3")]),
+    ((), (card("正在进行"),), []),
+    ((card(),), (card(corrected=1),), [("题卡订正", "Reading Test 3")]),
+    ((card(corrected=1),), (card(corrected=1), card(corrected=0)), [("题卡订正", "Reading Test 3")]),
+    ((card(corrected=0),), (card(corrected=1),), []),
+    ((card("正在进行"),), (card(corrected=0),), [("题卡完成", "Reading Test 3"), ("题卡订正", "Reading Test 3")]),
+])
+def test_change_kinds(before, after, expected):
+    assert kinds(paste(*before) if before else [], paste(*after)) == expected
+
+def test_new_failure_on_passed_range_in_appended_paste():
+    # 固定的基准 96%，追加粘贴后同一范围多了一次 80%
+    rows = diff_parsed(paste(attempt(96)), paste(attempt(96)) + paste(attempt(80)))
+    assert [(row["变化"], row["之前"], row["之后"]) for row in rows] == [
+        ("新未通过", "96% / 2.00s，未通过 0 次", "96% / 2.00s，未通过 1 次")
+    ]
+
+def test_same_paste_has_no_changes():
+    parsed = parse_text(generate_export(40, seed=4))
+    assert diff_parsed(parsed, parsed) == []
+    assert diff_counts([]) == {kind: (0, 0) for kind in DIFF_KINDS}
+
+def test_rows_follow_after_order_and_counts():
+    before = paste(attempt(80), name="孙八") + paste(attempt(80), name="周九")
+    after = paste(attempt(96), name="周九") + paste(attempt(80), attempt(96), card(), name="孙八")
+    rows = diff_parsed(before, after)
+    assert [row["姓名"] for row in rows] == ["周九", "孙八", "孙八"]
+    assert diff_counts(rows)["新通过"] == (2, 2)
+    assert diff_counts(rows)["题卡完成"] == (1, 1)
+
+def test_threshold_changes_the_outcome():
+    before, after = paste(attempt(90)), paste(attempt(90), attempt(92))
+    assert kinds(before, after, 94) == [("新未通过", "2601~2700")]
+    assert kinds(before, after, 85) == [("成绩提高", "2601~2700")]
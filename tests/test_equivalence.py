@@ -0,0 +1,214 @@
+"""analyze_data 与最初的两遍扫描实现逐字段对比
+
+baseline_analyze_data 原样取自最早的 vocab-analyzer.py（只去掉了行尾空白并改名），
+之后对解析、分类的任何优化都必须与它在各个分数线下输出相同。
+"""
+import re
+from collections import defaultdict
+
+import pytest
+
+from synthetic import generate_export
+from vocab_core import analyze_data
+
+THRESHOLDS = (85, 90, 94, 95, 100)
+
+def baseline_analyze_data(text, min_accuracy=94, show_failed=False):
+    """核心分析函数 - 提取词测和题卡数据"""
+    def extract_test_info(test_str):
+        test_type = "听测" if "听测" in test_str else "看测"
+        range_match = re.search(r'(\d+~\d+)|(?<!\d)(\d+)(?!\d)', test_str)
+        test_range = range_match.group() if range_match else "未知范围"
+        return test_type, test_range
+
+    history = defaultdict(list)
+    student_entries = re.split(r'\n\s*\n', text.strip())
+
+    for entry in student_entries:
+        if not entry:
+            continue
+
+        name_match = re.match(r'^(.+?)\s*:', entry)
+        if not name_match:
+            continue
+
+        full_name = name_match.group(1).strip()
+        tests = re.findall(r'【(词测|题卡) (.+?)】:\s*(.+?)(?:,\s*|$)', entry)
+
+        for test_type, test_info, test_result in tests:
+            if test_type == "词测":
+                if "正在进行" in test_result:
+                    continue
+
+                accuracy_match = re.search(r'正确率：(\d+)%', test_result)
+                if not accuracy_match:
+                    continue
+
+                accuracy = int(accuracy_match.group(1))
+                test_type, test_range = extract_test_info(test_info)
+                key = (full_name, test_type, test_range)
+                history[key].append(accuracy)
+
+    results = []
+    for entry in student_entries:
+        if not entry:
+            continue
+
+        name_match = re.match(r'^(.+?)\s*:', entry)
+        if not name_match:
+            continue
+
+        full_name = name_match.group(1).strip()
+        student_data = {
+            "name": full_name,
+            "passed": [],
+            "failed": [],
+            "question_cards": {
+                "SAT": [],
+                "TOEFL": []
+            }
+        }
+
+        tests = re.findall(r'【(词测|题卡) (.+?)】:\s*(.+?)(?:,\s*|$)', entry)
+        for test_type, test_info, test in tests:
+            if test_type == "词测":
+                if "正在进行" in test:
+                    continue
+
+                test_type, test_range = extract_test_info(test_info)
+                key = (full_name, test_type, test_range)
+
+                word_count = re.search(r'词数：(\d+)', test)
+                accuracy = re.search(r'正确率：(\d+)%', test)
+                time_taken = re.search(r'平均反应时间：([\d.]+)\s*s', test)
+                errors = re.search(r'错误个数：(\d+)', test)
+
+                if all([word_count, accuracy, time_taken, errors]):
+                    word_count = int(word_count.group(1))
+                    accuracy_val = int(accuracy.group(1))
+                    reaction_time = float(time_taken.group(1))
+                    errors = int(errors.group(1))
+
+                    previous_attempts = history.get(key, [])
+                    failed_attempts = sum(1 for a in previous_attempts if a < min_accuracy)
+
+                    if accuracy_val < min_accuracy:
+                        failed_attempts = max(0, failed_attempts - 1)
+
+                    test_data = {
+                        "type": test_type,
+                        "range": test_range,
+                        "count": word_count,
+                        "accuracy": accuracy_val,
+                        "time": reaction_time,
+                        "errors": errors,
+                        "accuracy_str": f"{accuracy_val}%{'*' * failed_attempts}"
+                    }
+
+                    if accuracy_val >= min_accuracy:
+                        student_data["passed"].append(test_data)
+                    else:
+                        student_data["failed"].append(test_data)
+
+            elif test_type == "题卡":
+                card_type = "SAT" if "[SAT]" in test_info else "TOEFL"
+                card_name = test_info.split('] ')[-1].strip()
+
+                initial_errors = re.search(r'错误个数: (\d+)/(\d+)', test)
+                corrected_errors = re.search(r'订正后错误个数: (\d+)/(\d+)', test)
+
+                if initial_errors:
+                    wrong = int(initial_errors.group(1))
+                    total = int(initial_errors.group(2))
+                    accuracy = round((total - wrong) / total * 100) if total > 0 else 0
+
+                    card_data = {
+                        "name": card_name,
+                        "initial_wrong": wrong,
+                        "total": total,
+                        "initial_accuracy": accuracy,
+                        "corrected_wrong": None,
+                        "corrected_accuracy": None,
+                        "status": "已完成" if "已完成" in test else "正在进行"
+                    }
+
+                    if corrected_errors:
+                        corrected_wrong = int(corrected_errors.group(1))
+                        corrected_accuracy = round((total - corrected_wrong) / total * 100) if total > 0 else 0
+                        card_data.update({
+                            "corrected_wrong": corrected_wrong,
+                            "corrected_accuracy": corrected_accuracy
+                        })
+
+                    student_data["question_cards"][card_type].append(card_data)
+
+        if student_data["passed"] or (show_failed and student_data["failed"]) or student_data["question_cards"]["SAT"] or student_data["question_cards"]["TOEFL"]:
+            results.append(student_data)
+
+    return results
+
+def strip_word_list(results):
+    """新版测试记录多了 word_list 字段（覆盖范围按词表区分），其余字段应与旧版一致"""
+    for student in results:
+        for group in ("passed", "failed"):
+            for test in student[group]:
+                test.pop("word_list", None)
+    return results
+
+CASES = {
+    "基本": (
+        "张三:【词测 托福核心-英义-所有义-听测-2601~2700-100】: 已完成 词数：100，正确率：96%，平均反应时间：2.10 s，错误个数：4,"
+        "【词测 托福核心-中义-看测-2701~2800-100】: 已完成 词数：100，正确率：90%，平均反应时间：3.20 s，错误个数：10,"
+        "【题卡 [SAT] Reading Test 3】: 已完成 错误个数: 2/20，订正后错误个数: 0/20\n\n"
+        "李四:【词测 SAT核心-英义-所有义-看测-1~100-100】: 已完成 词数：100，正确率：100%，平均反应时间：1.80 s，错误个数：0"
+    ),
+    "不完整记录": (
+        "王五:【词测 托福核心-英义-所有义-听测-1~100-100】: 已完成 词数：100，平均反应时间：2.00 s,"
+        "【词测 托福核心-英义-所有义-看测-101~200-100】: 已完成 正确率：97%,"
+        "【题卡 [TOEFL] Listening Practice 7】: 已完成,"
+        "【词测 托福核心-中义-看测】: 已完成 词数：100，正确率：88%,"
+        "【词测 托福核心-英义-所有义-看测-101~200-100】: 已完成 词数：100，正确率：99%，平均反应时间：2.00 s，错误个数：1\n\n"
+        "没有冒号的块 【词测 托福核心-中义-看测-1~100-100】: 已完成 正确率：99%\n\n"
+        "赵六:"
+    ),
+    "正在进行": (
+        "钱七:【词测 托福核心-中义-听测-301~400-100】: 正在进行,"
+        "【词测 托福核心-中义-听测-301~400-100】: 已完成 词数：100，正确率：95%，平均反应时间：2.50 s，错误个数：5,"
+        "【题卡 [SAT] Grammar Drill 12】: 正在进行 错误个数: 3/15"
+    ),
+    "同一学生多个块": (
+        "孙八:【词测 托福核心-英义-所有义-听测-2601~2700-100】: 已完成 词数：100，正确率：80%，平均反应时间：4.00 s，错误个数：20\n\n"
+        "周九:【词测 托福核心-英义-所有义-看测-1~100-100】: 已完成 词数：100，正确率：99%，平均反应时间：1.90 s，错误个数：1\n\n"
+        "孙八:【词测 托福核心-英义-所有义-听测-2601~2700-100】: 已完成 词数：100，正确率：92%，平均反应时间：3.00 s，错误个数：8\n\n"
+        "孙八 :【词测 托福核心-英义-所有义-听测-2601~2700-100】: 已完成 词数：100，正确率：96%，平均反应时间：2.00 s，错误个数：4"
+    ),
+    "零题题卡": (
+        "吴十:【题卡 [TOEFL] Reading Test 1】: 已完成 错误个数: 0/0，订正后错误个数: 0/0,"
+        "【题卡 [SAT] Reading Test 2】: 已完成 错误个数: 0/0"
+    ),
+    "分隔符": (
+        "\n\n  郑一 :  【词测 托福核心-中义-看测-1~100-100】:已完成 词数：100，正确率：94%，平均反应时间：2.00 s，错误个数：6 ,"
+        "  【题卡 [SAT] Reading Test 5】:  已完成 错误个数: 1/10\n \t \n"
+        "冯二:【词测 托福核心-中义-看测-1~100-100】: 已完成 词数：100，正确率：98%，平均反应时间：2.00 s，错误个数：2,【词测 托福核心-中义-听测-1~100-100】: 已完成 词数：100，正确率：91%，平均反应时间：2.00 s，错误个数：9\r\n\r\n"
+        "陈三:【词测 托福核心-中义-看测-201~300-100】: 已完成 词数：100，正确率：96%，平均反应时间：2.00 s，错误个数：4\n\n\n\n"
+        "褚四:【词测 托福核心-中义-看测-301~400-100】: 已完成 词数：100，正确率：95%，平均反应时间：2.00 s，错误个数：5，"
+        "【题卡 [TOEFL] Listening Practice 2】: 已完成 错误个数: 4/20\n\n"
+    ),
+    "空文本": "  \n\n \n",
+}
+
+@pytest.mark.parametrize("show_failed", (False, True))
+@pytest.mark.parametrize("min_accuracy", THRESHOLDS)
+@pytest.mark.parametrize("name", CASES)
+def test_matches_baseline(name, min_accuracy, show_failed):
+    text = CASES[name]
+    expected = baseline_analyze_data(text, min_accuracy, show_failed)
+    assert strip_word_list(analyze_data(text, min_accuracy, show_failed)) == expected
+
+@pytest.mark.parametrize("seed", range(3))
+@pytest.mark.parametrize("min_accuracy", THRESHOLDS)
+def test_matches_baseline_synthetic(seed, min_accuracy):
+    text = generate_export(60, seed=seed)
+    for show_failed in (False, True):
+        expected = baseline_analyze_data(text, min_accuracy, show_failed)
+        assert strip_word_list(analyze_data(text, min_accuracy, show_failed)) == expected
@@ -0,0 +1,87 @@
+"""HistoryStore：去重规则和按历史库统计的重试次数"""
+import pytest
+
+from synthetic import generate_export
+from vocab_core import HistoryStore, build_history, classify_entries, parse_text
+
+def attempt(word_list, accuracy, errors):
+    return (f"【词测 {word_list}-听测-2601~2700-100】: 已完成 "
+            f"词数：100，正确率：{accuracy}%，平均反应时间：2.00 s，错误个数：{errors}")
+
+def stars(results):
+    return [test["accuracy_str"] for student in results for test in student["passed"] + student["failed"]]
+
+def store_results(store, text, min_accuracy=94):
+    parsed = parse_text(text)
+    store.ingest(parsed)
+    return classify_entries(parsed, min_accuracy, True, store.history(build_history(parsed).keys()))
+
+@pytest.fixture
+def store(tmp_path):
+    with HistoryStore(str(tmp_path / "history.db")) as store:
+        yield store
+
+def test_reingesting_a_paste_is_idempotent(store):
+    text = generate_export(30, seed=1)
+    parsed = parse_text(text)
+    added = store.ingest(parsed)
+    assert added == sum(len(tests) for _, tests, _ in parsed)
+    before = store.history(build_history(parsed).keys())
+    assert store.ingest(parsed) == 0
+    assert store.ingest(parse_text(text)) == 0
+    assert len(store) == added
+    assert store.history(build_history(parsed).keys()) == before
+
+def test_repeated_identical_attempts_are_kept(store):
+    # 同一次粘贴里完全相同的两次未通过是真实的重试，都要计入
+    text = "孙八:" + ",".join((
+        attempt("托福核心-中义", 80, 20), attempt("托福核心-中义", 80, 20), attempt("托福核心-中义", 96, 4)
+    ))
+    assert store.ingest(parse_text(text)) == 3
+    assert store.ingest(parse_text(text)) == 0
+    assert stars(store_results(store, text)) == stars(classify_entries(parse_text(text), 94, True))
+    assert "96%**" in stars(store_results(store, text))
+
+@pytest.mark.parametrize("days", [((0, 20), (20, 40)), ((0, 25), (15, 40)), ((0, 40), (10, 30)), ((0, 10), (0, 40))])
+@pytest.mark.parametrize("min_accuracy", (85, 94, 100))
+def test_daily_pastes_match_full_history(tmp_path, days, min_accuracy):
+    """分天或有重叠地粘贴同一份导出，最后一次的重试次数等于对完整导出统计"""
+    blocks = generate_export(40, seed=2).strip().split("\n\n")
+    full_history = build_history(parse_text("\n\n".join(blocks)))
+    with HistoryStore(str(tmp_path / f"days{min_accuracy}.db")) as store:
+        for start, end in days:
+            text = "\n\n".join(blocks[start:end])
+            results = store_results(store, text, min_accuracy)
+        assert results == classify_entries(parse_text(text), min_accuracy, True, full_history)
+
+def test_snapshot_version_tracks_new_attempts(store):
+    first = parse_text(generate_export(10, seed=3))
+    second = parse_text(generate_export(10, seed=4))
+    keys = build_history(first + second).keys()
+    version, history = store.snapshot(keys)
+    assert version == 0
+    assert all(attempts == [] for attempts in history.values())
+
+    added = store.ingest(first)
+    version, history = store.snapshot(keys)
+    assert version == added
+    first_history = build_history(first)
+    assert {key: sorted(attempts) for key, attempts in history.items()} == {
+        key: sorted(first_history.get(key, [])) for key in keys
+    }
+    store.ingest(first)
+    assert store.snapshot(keys)[0] == version
+    added = store.ingest(second)
+    assert added > 0
+    assert store.snapshot(keys)[0] == version + added == len(store)
+
+def test_same_fields_in_different_word_lists_are_kept(store):
+    # 两个词表中类型、范围和成绩都相同的未通过记录，历史库中应算两次
+    text = "孙八:" + ",".join((
+        attempt("托福核心-英义-所有义", 80, 20),
+        attempt("托福核心-中义", 80, 20),
+        attempt("托福核心-中义", 96, 4),
+    ))
+    assert store.ingest(parse_text(text)) == 3
+    assert stars(store_results(store, text)) == stars(classify_entries(parse_text(text), 94, True))
+    assert "96%**" in stars(store_results(store, text))
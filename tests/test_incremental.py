@@ -0,0 +1,90 @@
+"""IncrementalParser 在追加、修改、删除、重复学生块后必须与整段重新解析一致"""
+import copy
+import random
+
+import pytest
+
+from synthetic import generate_export
+from vocab_core import (
+    IncrementalParser,
+    LRUCache,
+    build_history,
+    classify_entries,
+    parse_text,
+)
+
+def sorted_history(history):
+    """增量更新后同一 key 下正确率的顺序可能不同，比较前排序"""
+    return {key: sorted(attempts) for key, attempts in history.items() if attempts}
+
+def blocks_of(students, seed):
+    return generate_export(students, seed=seed).strip().split("\n\n")
+
+def assert_matches_full_parse(parser, blocks):
+    text = "\n\n".join(blocks)
+    parsed, history = parser.parse(text)
+    expected = parse_text(text)
+    assert parsed == expected
+    assert sorted_history(history) == sorted_history(build_history(expected))
+    assert classify_entries(parsed, 94, True, history) == classify_entries(expected, 94, True)
+    return history
+
+def append(blocks, rng, step):
+    return blocks + blocks_of(rng.randint(1, 5), 1000 + step)
+
+def edit(blocks, rng, step):
+    i = rng.randrange(len(blocks))
+    edited = blocks[i].replace("正确率：9", "正确率：8", 1)
+    if edited == blocks[i]:
+        edited += "\n【词测 托福核心-中义-看测-1~100-100】: 已完成 词数：100，正确率：70%，平均反应时间：3.00 s，错误个数：30"
+    return blocks[:i] + [edited] + blocks[i + 1:]
+
+def remove(blocks, rng, step):
+    i = rng.randrange(len(blocks))
+    return blocks[:i] + blocks[i + 1:]
+
+def duplicate(blocks, rng, step):
+    return blocks + [rng.choice(blocks)]
+
+SHARED_CACHE = LRUCache(50)
+OPERATIONS = {"append": append, "edit": edit, "remove": remove, "duplicate": duplicate}
+
+@pytest.mark.parametrize("operation", OPERATIONS)
+def test_single_operation(operation):
+    rng = random.Random(operation)
+    parser = IncrementalParser()
+    blocks = blocks_of(30, 0)
+    assert_matches_full_parse(parser, blocks)
+    for step in range(5):
+        blocks = OPERATIONS[operation](blocks, rng, step)
+        assert_matches_full_parse(parser, blocks)
+
+@pytest.mark.parametrize("seed", range(20))
+def test_mixed_operations(seed):
+    rng = random.Random(seed)
+    # 奇数 seed 共享块缓存，模拟多个会话复用同一个 entry_cache
+    parser = IncrementalParser(SHARED_CACHE if seed % 2 else None)
+    blocks = blocks_of(rng.randint(2, 30), seed)
+    for step in range(8):
+        operation = rng.choice(list(OPERATIONS)) if blocks else "append"
+        blocks = OPERATIONS[operation](blocks, rng, seed * 100 + step)
+        assert_matches_full_parse(parser, blocks)
+
+def test_returned_histories_are_not_mutated():
+    rng = random.Random(0)
+    parser = IncrementalParser()
+    blocks = blocks_of(20, 1)
+    snapshots = []
+    for step, operation in enumerate(("append", "edit", "duplicate", "remove", "edit", "append")):
+        _, history = parser.parse("\n\n".join(blocks))
+        snapshots.append((history, copy.deepcopy(history)))
+        blocks = OPERATIONS[operation](blocks, rng, step)
+    parser.parse("")
+    for history, frozen in snapshots:
+        assert history == frozen
+
+@pytest.mark.parametrize("text", ["", "\n\n\n", "赵六:", "没有冒号的块"])
+def test_degenerate_text(text):
+    parsed, history = IncrementalParser().parse(text)
+    assert parsed == parse_text(text)
+    assert sorted_history(history) == sorted_history(build_history(parsed))
@@ -0,0 +1,38 @@
+"""多进程解析必须与串行结果逐字节一致"""
+import pytest
+
+from synthetic import generate_export
+from test_equivalence import CASES
+from vocab_core import (
+    Diagnostics,
+    IncrementalParser,
+    analyze_data,
+    build_history,
+    classify_entries,
+    parse_text,
+    parse_text_parallel,
+)
+
+TEXTS = dict(CASES, 合成=generate_export(120, seed=9))
+
+@pytest.mark.parametrize("name", TEXTS)
+def test_parse_text_parallel_matches_serial(name):
+    text = TEXTS[name]
+    serial_diagnostics = Diagnostics()
+    parallel_diagnostics = Diagnostics()
+    expected = parse_text(text, diagnostics=serial_diagnostics)
+    parsed, history = parse_text_parallel(text, max_workers=2, min_entries=1, diagnostics=parallel_diagnostics)
+    assert parsed == expected
+    assert history == build_history(expected)
+    parallel_diagnostics.counters.pop("workers")
+    assert parallel_diagnostics.counters == serial_diagnostics.counters
+    for min_accuracy in (85, 94, 100):
+        assert classify_entries(parsed, min_accuracy, True, history) == analyze_data(text, min_accuracy, True)
+
+def test_incremental_parser_pool_matches_serial():
+    parser = IncrementalParser(max_workers=2, min_entries=1)
+    text = TEXTS["合成"]
+    for current in (text, text + "\n\n" + generate_export(30, seed=10)):
+        parsed, history = parser.parse(current)
+        assert parsed == parse_text(current)
+        assert classify_entries(parsed, 94, True, history) == analyze_data(current, 94, True)
@@ -0,0 +1,138 @@
+"""ResultIndex.search 与逐个学生暴力匹配的结果一致"""
+import random
+
+import pytest
+
+from synthetic import generate_export
+import vocab_core
+from vocab_core import CARD_TYPES, ResultIndex, analyze_data
+
+def fake_pinyin(name):
+    """每个汉字对应一个确定的“音节”，不依赖 pypinyin"""
+    return [f"p{ord(char) % 97}x" for char in name]
+
+def name_keys(name, pinyin):
+    keys = [name.lower()]
+    if pinyin is not None:
+        syllables = pinyin(name)
+        keys += ["".join(syllables).lower(), "".join(syllable[:1] for syllable in syllables).lower()]
+    return keys
+
+def brute_search(results, pinyin, name="", test_type=None, test_range="", status=None, card=""):
+    name, test_range, card = name.strip().lower(), test_range.strip(), card.strip().lower()
+    matches = []
+    for student_id, student in enumerate(results):
+        if name and not any(name in key for key in name_keys(student["name"], pinyin)):
+            continue
+        if test_type or status or test_range:
+            records = [
+                (group, test) for group in ("passed", "failed") for test in student[group]
+                if (not test_type or test["type"] == test_type)
+                and (not status or group == status)
+                and (not test_range or test_range == test["range"] or test_range in test["range"].split("~"))
+            ]
+            if not records:
+                continue
+        if card and not any(
+            card in f"{card_type} {item['name']}".lower()
+            for card_type in CARD_TYPES for item in student["question_cards"][card_type]
+        ):
+            continue
+        matches.append(student_id)
+    return matches
+
+@pytest.fixture(scope="module")
+def results():
+    return analyze_data(generate_export(150, seed=11), 94, True)
+
+def random_query(rng, results, pinyin):
+    student = rng.choice(results)
+    query = {}
+    if rng.random() < 0.5:
+        key = rng.choice(name_keys(student["name"], pinyin))
+        start = rng.randrange(len(key))
+        query["name"] = key[start:start + rng.randint(1, 3)]
+    if rng.random() < 0.4:
+        query["test_type"] = rng.choice(("听测", "看测"))
+    if rng.random() < 0.4:
+        query["status"] = rng.choice(("passed", "failed"))
+    if rng.random() < 0.5:
+        tests = student["passed"] + student["failed"]
+        if tests and rng.random() < 0.8:
+            test_range = rng.choice(tests)["range"]
+            query["test_range"] = rng.choice([test_range, *test_range.split("~")])
+        else:
+            query["test_range"] = str(rng.randint(1, 4000))
+    if rng.random() < 0.3:
+        cards = [f"{card_type} {card['name']}" for card_type in CARD_TYPES
+                 for card in student["question_cards"][card_type]]
+        text = rng.choice(cards) if cards else "Reading Test"
+        start = rng.randrange(len(text))
+        query["card"] = text[start:start + rng.randint(1, 8)]
+    return query
+
+@pytest.mark.parametrize("pinyin", (None, fake_pinyin))
+def test_random_queries_match_brute_force(results, pinyin, monkeypatch):
+    monkeypatch.setattr(vocab_core, "load_pinyin", lambda: None)
+    index = ResultIndex(results, pinyin)
+    rng = random.Random(0)
+    for _ in range(1000):
+        query = random_query(rng, results, pinyin)
+        assert index.search(**query) == brute_search(results, pinyin, **query), query
+
+def student(name, tests=(), cards=()):
+    record = {"name": name, "passed": [], "failed": [], "question_cards": {"SAT": [], "TOEFL": []}}
+    for test_type, test_range, status in tests:
+        record[status].append({"type": test_type, "range": test_range})
+    for card_type, card_name in cards:
+        record["question_cards"][card_type].append({"name": card_name})
+    return record
+
+@pytest.fixture
+def small_index():
+    results = [
+        student("张三", [("听测", "2601~2700", "passed"), ("看测", "1~100", "failed")], [("SAT", "Reading Test 12")]),
+        student("李四", [("看测", "2601~2700", "failed"), ("听测", "101~200", "passed")], [("TOEFL", "Listening 3")]),
+        student("张三丰", [("听测", "26", "passed")]),
+    ]
+    return ResultIndex(results, fake_pinyin)
+
+def test_empty_query_returns_everyone(small_index):
+    assert small_index.search() == [0, 1, 2]
+    assert small_index.search(name="  ", test_range=" ", card="") == [0, 1, 2]
+
+def test_name_and_pinyin_substrings(small_index):
+    assert small_index.search(name="张三") == [0, 2]
+    assert small_index.search(name="三丰") == [2]
+    assert small_index.search(name="".join(fake_pinyin("李四"))) == [1]
+    assert small_index.search(name="".join(syllable[0] for syllable in fake_pinyin("张三丰")).upper()) == [2]
+    assert small_index.search(name="王") == []
+
+def test_range_matches_whole_range_or_either_end(small_index):
+    assert small_index.search(test_range="2601~2700") == [0, 1]
+    assert small_index.search(test_range="2700") == [0, 1]
+    assert small_index.search(test_range="100") == [0]
+    assert small_index.search(test_range="101") == [1]
+    assert small_index.search(test_range="26") == [2]  # 数字子串不算，"26" 只匹配范围 "26"
+    assert small_index.search(test_range="2601~") == []
+
+def test_type_status_and_range_on_the_same_record(small_index):
+    # 张三：听测 2601~2700 通过、看测 1~100 未通过；不能拿两条记录各凑一个条件
+    assert small_index.search(test_type="听测", status="passed", test_range="2601~2700") == [0]
+    assert small_index.search(test_type="看测", test_range="2601~2700") == [1]
+    assert small_index.search(test_type="听测", status="failed") == []
+    assert small_index.search(status="failed", test_range="2700") == [1]
+
+def test_card_substrings(small_index):
+    assert small_index.search(card="reading") == [0]
+    assert small_index.search(card="sat read") == [0]
+    assert small_index.search(card="TOEFL") == [1]
+    assert small_index.search(card="Test 1") == [0]
+    assert small_index.search(card="Test 13") == []
+    assert small_index.search(name="张", card="listening") == []
+
+def test_real_pinyin():
+    pytest.importorskip("pypinyin")
+    index = ResultIndex([student("张三"), student("李四")])
+    assert index.search(name="zhangsan") == [0]
+    assert index.search(name="ls") == [1]
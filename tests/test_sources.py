@@ -0,0 +1,40 @@
+"""parse_sources 串行和进程池两条路径的结果必须一致，小输入不启动进程池，非 UTF-8 文件按 GB18030 解码"""
+import pytest
+
+from synthetic import generate_export
+from vocab_core import FALLBACK_ENCODING, PARALLEL_MIN_BYTES, parse_source, parse_sources
+
+def sources():
+    return [generate_export(students, seed=seed).encode("utf-8") for seed, students in enumerate((30, 5, 30))]
+
+def test_small_inputs_parse_serially(monkeypatch):
+    def no_pool(*args, **kwargs):
+        raise AssertionError("小输入不应启动进程池")
+
+    monkeypatch.setattr("concurrent.futures.ProcessPoolExecutor", no_pool)
+    files = sources()
+    progress = []
+    assert parse_sources(files, max_workers=4, progress=lambda *state: progress.append(state)) == [
+        parse_source(source) for source in files
+    ]
+    assert progress[-1] == (len(files), sum(map(len, files)))
+
+def test_pool_matches_serial():
+    files = sources()
+    assert parse_sources(files, max_workers=2, min_bytes=0) == parse_sources(files, max_workers=1)
+
+def test_gbk_files_fall_back_to_gb18030():
+    text = generate_export(10, seed=7)
+    gbk = text.encode("gbk")
+    with pytest.raises(UnicodeDecodeError):
+        parse_source(gbk)
+    expected = parse_source(text.encode("utf-8"))
+    assert parse_source(gbk, fallback_encoding=FALLBACK_ENCODING) == expected
+    for workers, min_bytes in ((1, PARALLEL_MIN_BYTES), (2, 0)):
+        assert parse_sources(
+            [gbk, text.encode("utf-8-sig")], workers, min_bytes=min_bytes, fallback_encoding=FALLBACK_ENCODING
+        ) == [expected, expected]
+
+def test_undecodable_files_still_raise():
+    with pytest.raises(UnicodeDecodeError):
+        parse_source("张三:".encode("utf-8") + b"\x80\xff", fallback_encoding=FALLBACK_ENCODING)
@@ -0,0 +1,49 @@
+"""ThresholdResults 在任意分数线下都必须与 classify_entries 一致，包括外部传入的 history"""
+import pytest
+
+from synthetic import generate_export
+from vocab_core import (
+    MIN_ACCURACY_RANGE,
+    ResultStore,
+    ThresholdResults,
+    build_history,
+    classify_entries,
+    parse_text,
+)
+
+THRESHOLDS = (0, 60, 80, MIN_ACCURACY_RANGE[0] - 1, *MIN_ACCURACY_RANGE, 94, MIN_ACCURACY_RANGE[1] + 1)
+
+@pytest.fixture(scope="module")
+def parsed():
+    return parse_text(generate_export(80, seed=3))
+
+@pytest.fixture(scope="module")
+def store_history(parsed):
+    """模拟历史库：本次的全部尝试之外，每个 key 还有一次更早的 70% 和一次 90%，另有不属于本次的 key"""
+    history = build_history(parsed)
+    for attempts in history.values():
+        attempts.extend((70, 90))
+    history[("不在本次的学生", "听测", "1~100")] = [50]
+    return history
+
+@pytest.mark.parametrize("min_accuracy", THRESHOLDS)
+def test_matches_classify(parsed, min_accuracy):
+    outcomes = ThresholdResults(ResultStore.from_parsed(parsed))
+    for show_failed in (False, True):
+        assert outcomes.results(min_accuracy, show_failed) == classify_entries(parsed, min_accuracy, show_failed)
+
+@pytest.mark.parametrize("min_accuracy", THRESHOLDS)
+def test_matches_classify_with_history(parsed, store_history, min_accuracy):
+    outcomes = ThresholdResults(ResultStore.from_parsed(parsed), store_history)
+    expected = classify_entries(parsed, min_accuracy, True, store_history)
+    assert outcomes.results(min_accuracy, True) == expected
+
+def test_table_rejects_out_of_range(parsed):
+    store = ResultStore.from_parsed(parsed)
+    failures = store.threshold_failures()
+    low, high = MIN_ACCURACY_RANGE
+    store.failed_attempts(low, failures)
+    store.failed_attempts(high, failures)
+    for min_accuracy in (low - 1, high + 1):
+        with pytest.raises(ValueError):
+            store.failed_attempts(min_accuracy, failures)
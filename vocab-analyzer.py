@@ -1,142 +1,162 @@
+import io
+import json
+import os
+import time
+
 import streamlit as st
-import re
-from collections import defaultdict
 from streamlit.components.v1 import html
-import time
 
-def analyze_data(text, min_accuracy=94, show_failed=False):
-    """核心分析函数 - 提取词测和题卡数据"""
-    def extract_test_info(test_str):
-        test_type = "听测" if "听测" in test_str else "看测"
-        range_match = re.search(r'(\d+~\d+)|(?<!\d)(\d+)(?!\d)', test_str)
-        test_range = range_match.group() if range_match else "未知范围"
-        return test_type, test_range
-    
-    history = defaultdict(list)
-    student_entries = re.split(r'\n\s*\n', text.strip())
-    
-    for entry in student_entries:
-        if not entry:
-            continue
-            
-        name_match = re.match(r'^(.+?)\s*:', entry)
-        if not name_match:
-            continue
-            
-        full_name = name_match.group(1).strip()
-        tests = re.findall(r'【(词测|题卡) (.+?)】:\s*(.+?)(?:,\s*|$)', entry)
-        
-        for test_type, test_info, test_result in tests:
-            if test_type == "词测":
-                if "正在进行" in test_result:
-                    continue
-                    
-                accuracy_match = re.search(r'正确率：(\d+)%', test_result)
-                if not accuracy_match:
-                    continue
-                    
-                accuracy = int(accuracy_match.group(1))
-                test_type, test_range = extract_test_info(test_info)
-                key = (full_name, test_type, test_range)
-                history[key].append(accuracy)
-    
-    results = []
-    for entry in student_entries:
-        if not entry:
-            continue
-            
-        name_match = re.match(r'^(.+?)\s*:', entry)
-        if not name_match:
-            continue
-            
-        full_name = name_match.group(1).strip()
-        student_data = {
-            "name": full_name,
-            "passed": [],
-            "failed": [],
-            "question_cards": {
-                "SAT": [],
-                "TOEFL": []
-            }
-        }
-        
-        tests = re.findall(r'【(词测|题卡) (.+?)】:\s*(.+?)(?:,\s*|$)', entry)
-        for test_type, test_info, test in tests:
-            if test_type == "词测":
-                if "正在进行" in test:
-                    continue
-                    
-                test_type, test_range = extract_test_info(test_info)
-                key = (full_name, test_type, test_range)
-                
-                word_count = re.search(r'词数：(\d+)', test)
-                accuracy = re.search(r'正确率：(\d+)%', test)
-                time_taken = re.search(r'平均反应时间：([\d.]+)\s*s', test)
-                errors = re.search(r'错误个数：(\d+)', test)
-                
-                if all([word_count, accuracy, time_taken, errors]):
-                    word_count = int(word_count.group(1))
-                    accuracy_val = int(accuracy.group(1))
-                    reaction_time = float(time_taken.group(1))
-                    errors = int(errors.group(1))
-                    
-                    previous_attempts = history.get(key, [])
-                    failed_attempts = sum(1 for a in previous_attempts if a < min_accuracy)
-                    
-                    if accuracy_val < min_accuracy:
-                        failed_attempts = max(0, failed_attempts - 1)
-                    
-                    test_data = {
-                        "type": test_type,
-                        "range": test_range,
-                        "count": word_count,
-                        "accuracy": accuracy_val,
-                        "time": reaction_time,
-                        "errors": errors,
-                        "accuracy_str": f"{accuracy_val}%{'*' * failed_attempts}"
-                    }
-                    
-                    if accuracy_val >= min_accuracy:
-                        student_data["passed"].append(test_data)
-                    else:
-                        student_data["failed"].append(test_data)
-            
-            elif test_type == "题卡":
-                card_type = "SAT" if "[SAT]" in test_info else "TOEFL"
-                card_name = test_info.split('] ')[-1].strip()
-                
-                initial_errors = re.search(r'错误个数: (\d+)/(\d+)', test)
-                corrected_errors = re.search(r'订正后错误个数: (\d+)/(\d+)', test)
-                
-                if initial_errors:
-                    wrong = int(initial_errors.group(1))
-                    total = int(initial_errors.group(2))
-                    accuracy = round((total - wrong) / total * 100) if total > 0 else 0
-                    
-                    card_data = {
-                        "name": card_name,
-                        "initial_wrong": wrong,
-                        "total": total,
-                        "initial_accuracy": accuracy,
-                        "corrected_wrong": None,
-                        "corrected_accuracy": None,
-                        "status": "已完成" if "已完成" in test else "正在进行"
-                    }
-                    
-                    if corrected_errors:
-                        corrected_wrong = int(corrected_errors.group(1))
-                        corrected_accuracy = round((total - corrected_wrong) / total * 100) if total > 0 else 0
-                        card_data.update({
-                            "corrected_wrong": corrected_wrong,
-                            "corrected_accuracy": corrected_accuracy
-                        })
-                    
-                    student_data["question_cards"][card_type].append(card_data)
-        
-        if student_data["passed"] or (show_failed and student_data["failed"]) or student_data["question_cards"]["SAT"] or student_data["question_cards"]["TOEFL"]:
-            results.append(student_data)
-    
-    return results
+from vocab_core import (
+    DIFF_KINDS, ENTRY_CACHE_ENTRIES, FALLBACK_ENCODING, MIN_ACCURACY_RANGE, TEST_TYPES, TIME_PERCENTILES, CoverageIndex, Diagnostics,
+    HistoryStore, IncrementalParser, LRUCache, ResultIndex, ResultStore, ThresholdResults, analyze_data_iter, build_history,
+    configure_logging, diff_counts, diff_parsed, export_bytes, export_coverage_bytes, export_diff_bytes,
+    format_intervals, has_results, hash_bytes, hash_text, parse_sources, profile_call
+)
+
+PARSE_CACHE_ENTRIES = 8  # 跨 rerun 缓存的解析结果份数
+PARSE_CACHE_TTL = 3600  # 解析缓存有效期（秒）
+RESULTS_PAGE_SIZES = (10, 20, 50, 100)  # 结果分页可选的每页学生数
+EXPORT_CACHE_ENTRIES = 16  # 缓存的导出文件份数
+DASHBOARD_CACHE_ENTRIES = 32  # 缓存的班级看板汇总份数（按输入和分数线）
+FILE_CACHE_ENTRIES = 64  # 按内容哈希缓存的上传文件解析结果份数
+HISTORY_DB_PATH = os.environ.get("VOCAB_HISTORY_DB", "vocab_history.sqlite3")  # 本地历史库位置
+LOG_LEVEL = os.environ.get("VOCAB_LOG_LEVEL", "INFO").upper()  # 每次分析的 JSON 诊断日志级别，设为 WARNING 即关闭
+EXPORT_FORMATS = {
+    "CSV": ("csv", "text/csv", "导出为Excel兼容格式"),
+    "Parquet": ("parquet", "application/vnd.apache.parquet", "带类型的列式格式，适合大数据量"),
+    "XLSX": ("xlsx", "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet", "Excel 工作簿"),
+    "HTML 报告": ("html", "text/html", "独立网页报告，浏览器直接打开，可发给家长或同事")
+}
+REPORT_HEIGHT = 800  # 页面内嵌报告的高度（像素）
+SEARCH_STATUSES = {"全部": None, "通过": "passed", "未通过": "failed"}  # 结果筛选选项 -> ResultIndex.search 的 status
+
+@st.cache_resource
+def app_logging():
+    """进程内只配置一次：每次分析的诊断以一行 JSON 写到服务的标准错误"""
+    return configure_logging(LOG_LEVEL)
+
+@st.cache_resource
+def parse_cache():
+    """进程内共享的解析缓存（各会话共用，解析结果只读）"""
+    return LRUCache(PARSE_CACHE_ENTRIES, PARSE_CACHE_TTL)
+
+@st.cache_resource
+def entry_cache():
+    """进程内共享的学生块解析缓存，供各会话的 IncrementalParser 使用"""
+    return LRUCache(ENTRY_CACHE_ENTRIES, PARSE_CACHE_TTL)
+
+def session_parser():
+    """每个会话一个增量解析器：追加粘贴后再次分析时只解析新增或改动的学生块"""
+    if "incremental_parser" not in st.session_state:
+        st.session_state["incremental_parser"] = IncrementalParser(entry_cache(), os.cpu_count() or 1)
+    return st.session_state["incremental_parser"]
+
+def cached_parse(text, text_hash, progress=None, diagnostics=None):
+    """按输入文本的哈希缓存与分数线无关的解析结果 (parsed, history)
+
+    调整分数线或显示选项时不需要重新解析；
+    命中缓存时不会回调 progress，diagnostics 只得到解析时的计数。
+    未命中时交给会话的增量解析器，只解析与上次相比新增或改动的学生块。
+    """
+    if diagnostics is None:
+        diagnostics = Diagnostics()
+
+    cache = parse_cache()
+    cached = cache.get(text_hash)
+    if cached is not None:
+        parsed, history, counters = cached
+        diagnostics.counters.update(counters)
+        diagnostics.counters["parse_cache_hits"] += 1
+        return parsed, history
+
+    parsed, history = session_parser().parse(text, progress, diagnostics)
+    cache.put(text_hash, (parsed, history, dict(diagnostics.counters)))
+    return parsed, history
+
+@st.cache_resource
+def file_cache():
+    """进程内共享的上传文件解析缓存，key 为文件内容哈希"""
+    return LRUCache(FILE_CACHE_ENTRIES, PARSE_CACHE_TTL)
+
+def cached_parse_files(files, progress=None, diagnostics=None):
+    """多个上传文件合并为一次分析 - files 为 [(内容哈希, bytes), ...]，返回 (parsed, history)
+
+    每个文件的解析结果按内容哈希缓存，新增或替换文件后只解析变化的文件；
+    未命中的文件交给 parse_sources 解析（合计足够大时在进程池中并发），不是 UTF-8 的文件按 GB18030 解码。
+    progress(已完成文件数, 已处理字节数)。
+    """
+    if diagnostics is None:
+        diagnostics = Diagnostics()
+
+    cache = file_cache()
+    parsed_files = {}
+    misses = {}
+    for file_hash, data in files:
+        cached = cache.get(file_hash)
+        if cached is None:
+            misses[file_hash] = data
+        else:
+            parsed_files[file_hash] = cached
+    diagnostics.counters["file_cache_hits"] += len(parsed_files)
+
+    with diagnostics.stage("parse_entries"):
+        for file_hash, parsed_file in zip(misses, parse_sources(misses.values(), progress=progress, fallback_encoding=FALLBACK_ENCODING)):
+            parsed_files[file_hash] = parsed_file
+            cache.put(file_hash, parsed_file)
+
+    parsed = []
+    for file_hash, _ in files:
+        file_parsed, entries, stats = parsed_files[file_hash]
+        parsed.extend(file_parsed)
+        diagnostics.count_parsed(file_parsed, entries)
+        diagnostics.counters.update(stats)
+    diagnostics.counters["files"] += len(files)
+    with diagnostics.stage("history"):
+        return parsed, build_history(parsed)
+
+def undecodable_uploads(uploads):
+    """按 UTF-8 和 FALLBACK_ENCODING 都解码不了的上传文件名"""
+    names = []
+    for upload in uploads:
+        data = upload.getvalue()
+        for encoding in ("utf-8-sig", FALLBACK_ENCODING):
+            try:
+                data.decode(encoding)
+                break
+            except UnicodeDecodeError:
+                continue
+        else:
+            names.append(upload.name)
+    return names
+
+def run_analysis(source, text_hash, min_accuracy, show_failed, use_history, progress, diagnostics):
+    """source 为粘贴的文本或上传文件列表，返回 (parsed, outcomes, results, history_version)
+
+    parsed 留给班级看板使用；outcomes 为所有分数线下的 ThresholdResults，拖动分数线时从中切片。
+    history_version 为读取时的历史库版本，不用历史库时为 None；它进入 results_key，
+    其它会话写入历史库后，按结果缓存的导出文件和报告不会再被复用。
+    """
+    if isinstance(source, str):
+        parsed, history = cached_parse(source, text_hash, progress, diagnostics)
+    else:
+        parsed, history = cached_parse_files(source, progress, diagnostics)
+    if use_history:
+        with diagnostics.stage("history_store"):
+            store = history_store()
+            store.ingest(parsed)
+            history_version, history = store.snapshot(history.keys())
+    else:
+        # 不用历史库时重试次数只统计本次的尝试，列式存储里已经有了
+        history_version, history = None, None
+    with diagnostics.stage("thresholds"):
+        outcomes = ThresholdResults(class_store(text_hash, parsed), history)
+    with diagnostics.stage("classify"):
+        return parsed, outcomes, outcomes.results(min_accuracy, show_failed), history_version
+
+@st.cache_resource
+def history_store():
+    """进程内共享的 SQLite 历史库连接 - 同一部署的所有会话共用，学生只按姓名区分"""
+    return HistoryStore(HISTORY_DB_PATH)
 
 def display_question_cards(cards, card_type):
     if not cards:
@@ -186,53 +206,429 @@ def display_test_table(tests):
         height=(len(table_data) * 35 + 38)
     )
 
-def export_options(results):
-    import pandas as pd
-    import io
-    
-    all_data = []
-    for student in results:
-        for test in student['passed'] + student['failed']:
-            all_data.append({
-                "姓名": student['name'],
-                "类型": "词测",
-                "测试类型": test["type"],
-                "测试范围": test["range"],
-                "词数": test["count"],
-                "正确率": test["accuracy"],
-                "反应时间": test["time"],
-                "错误数": test["errors"]
-            })
+def display_student(student, show_vocab, show_cards, show_failed):
+    display_student = False
+    
+    if (student['passed'] or (show_failed and student['failed'])) and show_vocab:
+        display_student = True
+        with st.container():
+            st.markdown(f"""
+            <div class="result-section">
+                <h3 style="color: var(--text-color); margin-bottom: 0.5rem;">👤 {student['name']}</h3>
+                <p style="color: var(--secondary-text); margin-top: 0;">📝 <b>词测结果</b></p>
+            </div>
+            """, unsafe_allow_html=True)
+            
+            if student['passed']:
+                st.markdown("""
+                <div style="display: flex; align-items: center; gap: 8px; color: var(--success-color); margin: 0.5rem 0;">
+                    <svg width="20" height="20" viewBox="0 0 24 24" fill="none" xmlns="http://www.w3.org/2000/svg">
+                        <path d="M9 16.17L4.83 12L3.41 13.41L9 19L21 7L19.59 5.59L9 16.17Z" fill="#34A853"/>
+                    </svg>
+                    <span style="font-weight: 500;">通过测试</span>
+                </div>
+                """, unsafe_allow_html=True)
+                display_test_table(student['passed'])
+                
+            if show_failed and student['failed']:
+                st.markdown("""
+                <div style="display: flex; align-items: center; gap: 8px; color: var(--danger-color); margin: 0.5rem 0;">
+                    <svg width="20" height="20" viewBox="0 0 24 24" fill="none" xmlns="http://www.w3.org/2000/svg">
+                        <path d="M19 6.41L17.59 5L12 10.59L6.41 5L5 6.41L10.59 12L5 17.59L6.41 19L12 13.41L17.59 19L19 17.59L13.41 12L19 6.41Z" fill="#EA4335"/>
+                    </svg>
+                    <span style="font-weight: 500;">未通过测试</span>
+                </div>
+                """, unsafe_allow_html=True)
+                display_test_table(student['failed'])
+    
+    if (student['question_cards']['SAT'] or student['question_cards']['TOEFL']) and show_cards:
+        if not display_student:
+            st.markdown(f"""
+            <div class="result-section">
+                <h3 style="color: var(--text-color); margin-bottom: 0.5rem;">👤 {student['name']}</h3>
+            </div>
+            """, unsafe_allow_html=True)
+            display_student = True
         
-        for card_type in ['SAT', 'TOEFL']:
-            for card in student['question_cards'][card_type]:
-                all_data.append({
-                    "姓名": student['name'],
-                    "类型": "题卡",
-                    "题卡类型": card_type,
-                    "题卡名称": card['name'],
-                    "状态": card['status'],
-                    "总题数": card['total'],
-                    "初次错误数": card['initial_wrong'],
-                    "初次正确率": card['initial_accuracy'],
-                    "订正后错误数": card['corrected_wrong'] if card['corrected_wrong'] is not None else "N/A",
-                    "订正后正确率": card['corrected_accuracy'] if card['corrected_accuracy'] is not None else "N/A"
-                })
-    
-    df = pd.DataFrame(all_data)
-    csv = df.to_csv(index=False).encode('utf-8-sig')
-    st.download_button(
-        "📥 导出CSV",
-        csv,
-        "词测分析结果.csv",
-        "text/csv",
-        help="导出为Excel兼容格式"
-    )
+        if student['question_cards']['SAT']:
+            display_question_cards(student['question_cards']['SAT'], "SAT")
+        if student['question_cards']['TOEFL']:
+            display_question_cards(student['question_cards']['TOEFL'], "TOEFL")
+    
+    if display_student:
+        st.markdown("---")
+
+def visible_students(results, show_vocab, show_cards, show_failed):
+    """按显示选项筛出会被渲染的学生"""
+    return [
+        student for student in results
+        if (show_vocab and (student['passed'] or (show_failed and student['failed'])))
+        or (show_cards and (student['question_cards']['SAT'] or student['question_cards']['TOEFL']))
+    ]
+
+def results_index(results, results_key):
+    """每次分析只构建一次倒排索引，保存在 session_state 中"""
+    cached = st.session_state.get("results_index")
+    if cached is None or cached[0] != results_key:
+        cached = (results_key, ResultIndex(results))
+        st.session_state["results_index"] = cached
+    return cached[1]
+
+def search_bar():
+    """搜索和筛选条件，返回 ResultIndex.search 的参数"""
+    cols = st.columns([3, 1, 2, 1, 2])
+    with cols[0]:
+        name = st.text_input("🔎 姓名", placeholder="姓名片段、拼音或首字母", key="search_name")
+    with cols[1]:
+        test_type = st.selectbox("测试类型", ("全部",) + TEST_TYPES, key="search_type")
+    with cols[2]:
+        test_range = st.text_input("范围", placeholder="如 2601~2700 或 2601", key="search_range")
+    with cols[3]:
+        status = st.selectbox("结果", list(SEARCH_STATUSES), key="search_status")
+    with cols[4]:
+        card = st.text_input("题卡名称", placeholder="如 SAT Test 5", key="search_card")
+    return {
+        "name": name,
+        "test_type": None if test_type == "全部" else test_type,
+        "test_range": test_range,
+        "status": SEARCH_STATUSES[status],
+        "card": card
+    }
+
+def display_results(results, results_key, show_vocab, show_cards, show_failed):
+    """分页渲染结果 - 先用索引筛选，只有当前页的学生会发送到前端"""
+    query = search_bar()
+    if any(query.values()):
+        results = [results[i] for i in results_index(results, results_key).search(**query)]
+        # 按未通过筛选时要能看到未通过的词测
+        show_failed = show_failed or query["status"] == "failed"
+    
+    students = visible_students(results, show_vocab, show_cards, show_failed)
+    if not students:
+        st.info("没有符合条件的结果")
+        return
+    
+    cols = st.columns([1, 1, 3])
+    with cols[0]:
+        page_size = st.selectbox("每页学生数", RESULTS_PAGE_SIZES, index=1, key="results_page_size")
+    page_count = -(-len(students) // page_size)
+    if st.session_state.get("results_page", 1) > page_count:
+        st.session_state["results_page"] = page_count
+    with cols[1]:
+        page = st.number_input("页码", min_value=1, max_value=page_count, step=1, key="results_page")
+    with cols[2]:
+        st.caption(f"共 {len(students)} 名学生，第 {page}/{page_count} 页")
+    
+    for student in students[(page - 1) * page_size:page * page_size]:
+        display_student(student, show_vocab, show_cards, show_failed)
+
+def parse_cached(source, text_hash):
+    """这次分析的输入是否已在解析缓存中（粘贴文本按文本哈希，上传文件按每个文件的内容哈希）"""
+    if isinstance(source, str):
+        return parse_cache().get(text_hash) is not None
+    cache = file_cache()
+    return all(cache.get(file_hash) is not None for file_hash, _ in source)
+
+def stream_preview(source, placeholder, min_accuracy):
+    """完整分析结束前先显示第一页 - 流式读取粘贴的文本或第一个上传文件，每解析完一个学生就渲染
+
+    只读到凑满一页为止，重试 * 号只统计已读到的尝试；完整结果出来后调用方清空 placeholder。
+    编码识别交给完整分析：遇到不是 UTF-8 的文件时预览直接停止。
+    """
+    stream = io.StringIO(source) if isinstance(source, str) else io.BytesIO(source[0][1])
+    page_size = st.session_state.get("results_page_size", RESULTS_PAGE_SIZES[1])
+    show_vocab = st.session_state.get("show_vocab", True)
+    show_cards = st.session_state.get("show_cards", True)
+    show_failed = st.session_state.get("show_failed", False)
+    container = placeholder.container()
+    with container:
+        status = st.caption("预览：完整结果分析中，先显示已读到的学生")
+    shown = 0
+    try:
+        for student in analyze_data_iter(stream, min_accuracy, show_failed, encoding="utf-8-sig"):
+            if not visible_students([student], show_vocab, show_cards, show_failed):
+                continue
+            with container:
+                display_student(student, show_vocab, show_cards, show_failed)
+            shown += 1
+            status.caption(f"预览：完整结果分析中，先显示已读到的前 {shown} 名学生")
+            if shown >= page_size:
+                break
+    except UnicodeDecodeError:
+        pass
+
+@st.cache_resource(max_entries=PARSE_CACHE_ENTRIES, show_spinner=False)
+def class_store(text_hash, _parsed):
+    """按输入哈希缓存的列式存储，看板汇总都在它上面按列计算"""
+    return ResultStore.from_parsed(_parsed)
+
+@st.cache_data(max_entries=DASHBOARD_CACHE_ENTRIES, show_spinner=False)
+def class_dashboard(text_hash, min_accuracy, _parsed):
+    """按 (输入哈希, 分数线) 缓存看板汇总，切换视图和筛选时不再扫描原始记录"""
+    store = class_store(text_hash, _parsed)
+    return store.class_summary(min_accuracy), store.range_summary(min_accuracy), store.card_summary()
+
+@st.cache_data(max_entries=DASHBOARD_CACHE_ENTRIES, show_spinner=False)
+def pass_rate_curve(text_hash, _parsed):
+    """按输入哈希缓存各分数线下的通过率，与分数线无关"""
+    return class_store(text_hash, _parsed).pass_rate_curve()
+
+def display_dashboard(parsed, text_hash, min_accuracy):
+    """班级看板 - 按测试范围和题卡汇总的通过率、分位数和重试次数"""
+    overview, ranges, cards = class_dashboard(text_hash, min_accuracy, parsed)
+    
+    cols = st.columns(5)
+    cols[0].metric("学生数", overview["学生数"])
+    cols[1].metric("词测次数", overview["词测次数"], help=f"其中重试 {overview['重试次数']} 次")
+    cols[2].metric("通过率", "-" if overview["通过率"] is None else f"{overview['通过率']}%")
+    cols[3].metric("有未通过词测的学生", overview["有未通过词测的学生"])
+    cols[4].metric("题卡平均正确率", "-" if overview["平均初次正确率"] is None else f"{overview['平均初次正确率']}%",
+                   help=f"订正后 {overview['平均订正后正确率'] or '-'}%")
+    
+    curve = pass_rate_curve(text_hash, parsed)
+    if curve:
+        with st.expander("📈 通过率 - 分数线曲线", expanded=False):
+            st.line_chart(curve, x="分数线", y=["通过率", "学生通过率"], height=240)
+            st.caption(f"当前分数线 {min_accuracy}%。通过率按尝试次数计，学生通过率为至少通过一次的 (学生, 范围) 比例")
+    
+    view = st.radio("看板视图", ("词测范围", "题卡"), horizontal=True, key="dashboard_view")
+    if view == "词测范围":
+        test_type = st.selectbox("测试类型", ("全部",) + TEST_TYPES, key="dashboard_test_type")
+        rows = [row for row in ranges if test_type == "全部" or row["测试类型"] == test_type]
+        if not rows:
+            st.info("没有词测记录")
+            return
+        st.dataframe(
+            rows,
+            column_config={
+                "通过率": st.column_config.ProgressColumn("通过率", min_value=0, max_value=100, format="%.1f%%",
+                                                         help="按尝试次数计"),
+                "学生通过率": st.column_config.ProgressColumn("学生通过率", min_value=0, max_value=100, format="%.1f%%",
+                                                             help="至少通过一次的学生比例"),
+                "重试次数": st.column_config.NumberColumn("重试次数", help="尝试次数减去学生数"),
+                **{f"反应时间P{q}": st.column_config.NumberColumn(f"反应时间P{q}", format="%.2fs") for q in TIME_PERCENTILES},
+            },
+            hide_index=True,
+            use_container_width=True
+        )
+        weakest = sorted((row for row in rows if row["通过率"] is not None), key=lambda row: row["通过率"])[:5]
+        st.caption("通过率最低的范围: " + "，".join(f"{row['测试类型']} {row['范围']} ({row['通过率']}%)" for row in weakest))
+    else:
+        if not cards:
+            st.info("没有题卡记录")
+            return
+        st.dataframe(
+            cards,
+            column_config={
+                "平均初次正确率": st.column_config.ProgressColumn("平均初次正确率", min_value=0, max_value=100, format="%.1f%%"),
+                "平均订正后正确率": st.column_config.ProgressColumn("平均订正后正确率", min_value=0, max_value=100,
+                                                                   format="%.1f%%"),
+            },
+            hide_index=True,
+            use_container_width=True
+        )
+
+@st.cache_data(max_entries=EXPORT_CACHE_ENTRIES, show_spinner=False)
+def export_file(results_key, fmt, _results):
+    """按 (输入哈希, 分数线, 历史库版本, 显示未通过) 和格式缓存导出文件；不用历史库时版本为 None"""
+    return export_bytes(_results, fmt)
+
+def export_options(results, results_key, diagnostics):
+    """导出文件只在点击生成后才构建，之后按结果缓存"""
+    fmt = st.radio("导出格式", list(EXPORT_FORMATS), horizontal=True, key="export_format")
+    extension, mime, help_text = EXPORT_FORMATS[fmt]
+    
+    if st.button("⚙️ 生成导出文件"):
+        st.session_state["export_request"] = (results_key, fmt)
+    
+    if st.session_state.get("export_request") == (results_key, fmt):
+        try:
+            diagnostics.timings.pop("export", None)
+            with diagnostics.stage("export"):
+                data = export_file(results_key, extension, results)
+        except ImportError as e:
+            st.error(f"导出{fmt}需要安装 {e.name}")
+        else:
+            st.download_button(
+                f"📥 导出{fmt}",
+                data,
+                f"词测分析结果.{extension}",
+                mime,
+                help=help_text
+            )
     
     if st.checkbox("显示处理后的原始数据"):
         st.json(results, expanded=False)
 
 
+def display_diagnostics(diagnostics, profile):
+    st.markdown("#### 🩺 诊断信息")
+    data = diagnostics.to_dict()
+    st.json(data)
+    st.download_button("下载诊断 JSON", json.dumps(data, ensure_ascii=False, indent=2), "diagnostics.json", "application/json")
+    if profile is not None:
+        report, raw_stats = profile
+        st.download_button("下载性能剖析报告", report, "profile.txt", "text/plain")
+        st.download_button("下载 pstats 数据", raw_stats, "profile.prof", "application/octet-stream",
+                           help="可用 python -m pstats 或 snakeviz 打开")
+
+def coverage_index(results, results_key):
+    """每次分析只构建一次区间索引，保存在 session_state 中"""
+    cached = st.session_state.get("coverage_index")
+    if cached is None or cached[0] != results_key:
+        cached = (results_key, CoverageIndex.from_results(results))
+        st.session_state["coverage_index"] = cached
+    return cached[1]
+
+@st.cache_data(max_entries=EXPORT_CACHE_ENTRIES, show_spinner=False)
+def coverage_file(results_key, _results):
+    """按结果缓存已通过范围的 CSV，与词测记录的导出文件分开"""
+    return export_coverage_bytes(_results)
+
+def display_coverage(results, results_key):
+    """覆盖范围 - 每个学生已通过的词表范围、目标范围内的覆盖率和第一个缺口"""
+    index = coverage_index(results, results_key)
+    if not index.keys():
+        st.info("没有可识别范围的已通过词测")
+        return
+    
+    cols = st.columns([1, 1, 1, 1, 2])
+    with cols[0]:
+        word_list = st.selectbox("词表", ["全部"] + index.word_lists(), key="coverage_word_list")
+    with cols[1]:
+        test_type = st.selectbox("测试类型", ("全部",) + TEST_TYPES, key="coverage_test_type")
+    with cols[2]:
+        target_start = st.number_input("目标起点", min_value=1, value=1, step=100, key="coverage_start")
+    with cols[3]:
+        target_end = st.number_input("目标终点", min_value=1, value=max(index.max_end, 1), step=100, key="coverage_end")
+    if target_end < target_start:
+        st.warning("目标终点不能小于起点")
+        return
+    
+    target_words = target_end - target_start + 1
+    rows = []
+    for key in index.keys():
+        name, key_list, key_type = key
+        if (word_list != "全部" and key_list != word_list) or (test_type != "全部" and key_type != test_type):
+            continue
+        covered = index.covered_words(key, target_start, target_end)
+        gap = index.first_gap(key, target_start, target_end)
+        rows.append({
+            "姓名": name,
+            "词表": key_list,
+            "测试类型": key_type,
+            "已通过范围": format_intervals(index.coverage(key)),
+            "目标内已覆盖词数": covered,
+            "覆盖率": round(covered / target_words * 100, 1),
+            "第一个缺口": "无" if gap is None else format_intervals([gap])
+        })
+    with cols[4]:
+        st.caption(f"目标范围 {target_start}~{target_end}，共 {len(rows)} 条")
+    st.dataframe(
+        rows,
+        column_config={
+            "覆盖率": st.column_config.ProgressColumn("覆盖率", min_value=0, max_value=100, format="%.1f%%")
+        },
+        hide_index=True,
+        use_container_width=True
+    )
+    st.download_button("📥 导出已通过范围 CSV", coverage_file(results_key, results), "已通过范围.csv", "text/csv",
+                       help="每个合并后的区间一行；XLSX 导出中也有单独的覆盖范围工作表")
+
+def snapshot_diff(baseline_hash, baseline_parsed, results_key, parsed):
+    """每对 (基准, 当前分析) 只对比一次，结果和导出的 CSV 保存在 session_state 中"""
+    key = (baseline_hash,) + results_key
+    cached = st.session_state.get("snapshot_diff")
+    if cached is None or cached[0] != key:
+        diff = diff_parsed(baseline_parsed, parsed, results_key[1])
+        cached = (key, diff, export_diff_bytes(diff))
+        st.session_state["snapshot_diff"] = cached
+    return cached[1], cached[2]
+
+def display_diff(parsed, results_key):
+    """对比 - 与固定的基准分析或粘贴的旧导出相比，每个学生新通过、新未通过、成绩提高和题卡进展"""
+    cols = st.columns([1, 3])
+    with cols[0]:
+        if st.button("📌 把当前分析设为对比基准", use_container_width=True):
+            st.session_state["diff_baseline"] = (results_key[0], parsed, time.strftime("%H:%M"))
+    pinned = st.session_state.get("diff_baseline")
+    baseline_text = st.text_area("或粘贴之前的导出作为基准（优先于固定的基准）", height=100, key="diff_input")
+    
+    if baseline_text.strip():
+        baseline_hash = hash_text(baseline_text)
+        baseline_parsed, _ = cached_parse(baseline_text, baseline_hash)
+        label = "粘贴的导出"
+    elif pinned is not None:
+        baseline_hash, baseline_parsed, pinned_at = pinned
+        label = f"{pinned_at} 固定的分析"
+    else:
+        st.info("先把一次分析设为对比基准，或粘贴之前的导出")
+        return
+    with cols[1]:
+        st.caption(f"基准: {label}（{len(baseline_parsed)} 个学生块），分数线 {results_key[1]}%")
+    
+    diff, data = snapshot_diff(baseline_hash, baseline_parsed, results_key, parsed)
+    counts = diff_counts(diff)
+    for col, (kind, (rows, students)) in zip(st.columns(len(DIFF_KINDS)), counts.items()):
+        col.metric(kind, rows, help=f"涉及 {students} 名学生")
+    
+    kinds = st.multiselect("变化类型", DIFF_KINDS, default=list(DIFF_KINDS), key="diff_kinds")
+    rows = [row for row in diff if row["变化"] in kinds]
+    if not rows:
+        st.info("与基准相比没有变化")
+        return
+    st.dataframe(rows, hide_index=True, use_container_width=True)
+    st.download_button("📥 导出对比结果 CSV", data, "词测对比结果.csv", "text/csv", help="包含全部变化类型")
+
+def shown_results(results, show_failed):
+    """按 "显示词测未通过记录" 筛掉只有未通过词测的学生，与 classify_entries(show_failed=...) 一致"""
+    return results if show_failed else [student for student in results if has_results(student, False)]
+
+@st.experimental_fragment
+def results_fragment():
+    """结果区 - 显示选项、视图、搜索和翻页只重跑这个片段，数据都取自 session_state"""
+    results = st.session_state["results"]
+    results_key = st.session_state["results_key"]
+    diagnostics = st.session_state["diagnostics"]
+    
+    show_failed = st.session_state.get("show_failed", False)
+    
+    cols = st.columns(2)
+    with cols[0]:
+        with st.container(border=True):
+            show_vocab = st.checkbox("显示词测结果", value=True, key="show_vocab")
+    with cols[1]:
+        with st.container(border=True):
+            show_cards = st.checkbox("显示题卡结果", value=True, key="show_cards")
+    
+    diagnostics.timings.pop("render", None)
+    results_view = st.radio("结果视图", ("学生", "班级看板", "覆盖范围", "对比", "报告"), horizontal=True, key="results_view",
+                            help="报告视图把整份 HTML 报告一次嵌入页面，按结果缓存，翻看时不再逐个渲染学生")
+    with diagnostics.stage("render"):
+        if results_view == "学生":
+            display_results(results, results_key, show_vocab, show_cards, show_failed)
+        elif results_view == "报告":
+            report = export_file(results_key + (show_failed,), "html", shown_results(results, show_failed))
+            html(report.decode("utf-8"), height=REPORT_HEIGHT, scrolling=True)
+        elif results_view == "覆盖范围":
+            display_coverage(results, results_key)
+        elif results_view == "对比":
+            display_diff(st.session_state["parsed"], results_key)
+        else:
+            text_hash, analyzed_accuracy = results_key[:2]
+            display_dashboard(st.session_state["parsed"], text_hash, analyzed_accuracy)
+
+@st.experimental_fragment
+def export_fragment():
+    """导出区 - 切换格式和生成文件只重跑这个片段"""
+    show_failed = st.session_state.get("show_failed", False)
+    with st.expander("📤 导出结果", expanded=False):
+        export_options(
+            shown_results(st.session_state["results"], show_failed),
+            st.session_state["results_key"] + (show_failed,),
+            st.session_state["diagnostics"]
+        )
+
 def main():
     st.set_page_config(
         layout="wide", 
@@ -240,6 +636,7 @@ def main():
         page_icon="📚",
         initial_sidebar_state="expanded"
     )
+    app_logging()
     
     # Google-style CSS with animations
     st.markdown("""
@@ -423,30 +820,46 @@ def main():
             placeholder="xxx同学 : 【词测 托福核心-英义-所有义-看测-2601~2700-100】: 已完成 词数：100，正确率：95%，平均反应时间：3.67 s，错误个数：5",
             key="input_area"
         )
+        uploads = st.file_uploader(
+            "或上传导出的 .txt 文件（可多选，合并为一次分析）",
+            type=["txt"],
+            accept_multiple_files=True,
+            key="input_files"
+        )
     
     st.markdown("### 🎛️ 分析设置")
-    cols = st.columns(4)
+    cols = st.columns(2)
     with cols[0]:
         with st.container(border=True):
-            min_accuracy = st.slider("词测通过分数线 (%)", 85, 100, 94)
+            min_accuracy = st.slider("词测通过分数线 (%)", *MIN_ACCURACY_RANGE, 94,
+                                     help="分析时已算好每个分数线下的结果，拖动后直接更新，不需要重新分析")
     with cols[1]:
         with st.container(border=True):
-            show_failed = st.checkbox("显示词测未通过记录", value=False)
-    with cols[2]:
-        with st.container(border=True):
-            show_vocab = st.checkbox("显示词测结果", value=True)
-    with cols[3]:
-        with st.container(border=True):
-            show_cards = st.checkbox("显示题卡结果", value=True)
+            # 同时影响结果区和导出区，所以留在片段外，切换时整页重跑（结果取自 session_state，不会重新分析）
+            st.checkbox("显示词测未通过记录", value=False, key="show_failed")
+    
+    with st.sidebar:
+        use_history = st.checkbox(
+            "使用本地历史记录",
+            value=False,
+            help="把每次分析的词测记录存入本地数据库，重试次数(*号)会统计以前粘贴过的记录。"
+                 "同一个部署的所有使用者共用一个历史库，按姓名区分学生：不同班级的同名学生会共享重试次数"
+        )
+        if use_history:
+            st.caption(f"历史库中共 {len(history_store())} 条词测记录")
+        show_diagnostics = st.checkbox("显示诊断信息", value=False, help="各阶段耗时和解析计数")
+        capture_profile = st.checkbox("采集性能剖析", value=False, help="下次分析时用 cProfile 和 tracemalloc 记录，可下载报告")
+        diagnostics_panel = st.container()
     
     if st.button("🔍 开始分析", type="primary", use_container_width=True):
-        if not input_data.strip():
-            st.warning("请先粘贴数据!")
+        if not uploads and not input_data.strip():
+            st.warning("请先粘贴数据或上传文件!")
             st.stop()
         
         with st.spinner(""):
             progress_bar = st.progress(0)
             status_text = st.empty()
+            preview = st.empty()
             
             status_text.markdown("""
             <div style="text-align: center;">
@@ -455,18 +868,52 @@ def main():
             </div>
             """, unsafe_allow_html=True)
             
-            for i in range(100):
-                time.sleep(0.01)
-                progress_bar.progress(i + 1)
-                if i % 20 == 0:
-                    status_text.markdown(f"""
-                    <div style="text-align: center;">
-                        <div class="loading-spinner"></div>
-                        <p style="margin-top: 10px; color: var(--secondary-text);">分析中... {i+1}%</p>
-                    </div>
-                    """, unsafe_allow_html=True)
+            # 上传了文件时以文件为准，按 (文件数, 字节数) 报告进度
+            diagnostics = Diagnostics()
+            with diagnostics.stage("hash"):
+                if uploads:
+                    source = [(hash_bytes(data), data) for data in (upload.getvalue() for upload in uploads)]
+                    text_hash = hash_text("files:" + ",".join(file_hash for file_hash, _ in source))
+                    input_size = sum(len(data) for _, data in source)
+                    unit = "个文件"
+                else:
+                    source = input_data
+                    text_hash = hash_text(input_data)
+                    input_size = len(input_data)
+                    unit = "个学生块"
+            total_size = max(input_size, 1)
+
+            def report_progress(done, processed):
+                percent = min(100, processed * 100 // total_size)
+                progress_bar.progress(percent)
+                status_text.markdown(f"""
+                <div style="text-align: center;">
+                    <div class="loading-spinner"></div>
+                    <p style="margin-top: 10px; color: var(--secondary-text);">分析中... {percent}%（已处理 {done} {unit}）</p>
+                </div>
+                """, unsafe_allow_html=True)
+            
+            # 没有命中解析缓存时完整分析要花些时间，先流式渲染第一页
+            if not parse_cached(source, text_hash):
+                stream_preview(source, preview, min_accuracy)
             
-            results = analyze_data(input_data, min_accuracy, show_failed)
+            # 始终保留只有未通过词测的学生，"显示词测未通过记录" 只影响显示和导出
+            analysis = (source, text_hash, min_accuracy, True, use_history, report_progress, diagnostics)
+            try:
+                if capture_profile:
+                    (parsed, outcomes, results, history_version), report, raw_stats = profile_call(run_analysis, *analysis)
+                    st.session_state["profile"] = (report, raw_stats)
+                else:
+                    parsed, outcomes, results, history_version = run_analysis(*analysis)
+            except UnicodeDecodeError:
+                progress_bar.empty()
+                status_text.empty()
+                preview.empty()
+                names = "、".join(undecodable_uploads(uploads)) or "上传的文件"
+                st.error(f"无法识别 {names} 的文字编码，请用记事本另存为 UTF-8 编码后重新上传")
+                st.stop()
+            diagnostics.log(event="analyze", input_size=input_size, files=len(uploads))
+            preview.empty()
             
             progress_bar.progress(100)
             status_text.markdown("""
@@ -477,9 +924,6 @@ def main():
                 <p style="margin-top: 10px; color: var(--success-color); font-weight: 500;">分析完成</p>
             </div>
             """, unsafe_allow_html=True)
-            
-            time.sleep(0.5)
-            status_text.empty()
         
         html("""
         <script>
@@ -503,59 +947,12 @@ def main():
         </script>
         """)
         
-        results_container = st.container()
-        with results_container:
-            for student in results:
-                display_student = False
-                
-                if (student['passed'] or (show_failed and student['failed'])) and show_vocab:
-                    display_student = True
-                    with st.container():
-                        st.markdown(f"""
-                        <div class="result-section">
-                            <h3 style="color: var(--text-color); margin-bottom: 0.5rem;">👤 {student['name']}</h3>
-                            <p style="color: var(--secondary-text); margin-top: 0;">📝 <b>词测结果</b></p>
-                        </div>
-                        """, unsafe_allow_html=True)
-                        
-                        if student['passed']:
-                            st.markdown("""
-                            <div style="display: flex; align-items: center; gap: 8px; color: var(--success-color); margin: 0.5rem 0;">
-                                <svg width="20" height="20" viewBox="0 0 24 24" fill="none" xmlns="http://www.w3.org/2000/svg">
-                                    <path d="M9 16.17L4.83 12L3.41 13.41L9 19L21 7L19.59 5.59L9 16.17Z" fill="#34A853"/>
-                                </svg>
-                                <span style="font-weight: 500;">通过测试</span>
-                            </div>
-                            """, unsafe_allow_html=True)
-                            display_test_table(student['passed'])
-                            
-                        if show_failed and student['failed']:
-                            st.markdown("""
-                            <div style="display: flex; align-items: center; gap: 8px; color: var(--danger-color); margin: 0.5rem 0;">
-                                <svg width="20" height="20" viewBox="0 0 24 24" fill="none" xmlns="http://www.w3.org/2000/svg">
-                                    <path d="M19 6.41L17.59 5L12 10.59L6.41 5L5 6.41L10.59 12L5 17.59L6.41 19L12 13.41L17.59 19L19 17.59L13.41 12L19 6.41Z" fill="#EA4335"/>
-                                </svg>
-                                <span style="font-weight: 500;">未通过测试</span>
-                            </div>
-                            """, unsafe_allow_html=True)
-                            display_test_table(student['failed'])
-                
-                if (student['question_cards']['SAT'] or student['question_cards']['TOEFL']) and show_cards:
-                    if not display_student:
-                        st.markdown(f"""
-                        <div class="result-section">
-                            <h3 style="color: var(--text-color); margin-bottom: 0.5rem;">👤 {student['name']}</h3>
-                        </div>
-                        """, unsafe_allow_html=True)
-                        display_student = True
-                    
-                    if student['question_cards']['SAT']:
-                        display_question_cards(student['question_cards']['SAT'], "SAT")
-                    if student['question_cards']['TOEFL']:
-                        display_question_cards(student['question_cards']['TOEFL'], "TOEFL")
-                
-                if display_student:
-                    st.markdown("---")
+        st.session_state["results"] = results
+        st.session_state["outcomes"] = outcomes
+        st.session_state["parsed"] = parsed
+        st.session_state["results_key"] = (text_hash, min_accuracy, history_version)
+        st.session_state["results_page"] = 1
+        st.session_state["diagnostics"] = diagnostics
         
         html(f"""
         <script>
@@ -567,10 +964,28 @@ def main():
             }}, 300);
         </script>
         """)
-        
-        st.markdown("---")
-        with st.expander("📤 导出结果", expanded=False):
-            export_options(results)
+    
+    if st.session_state.get("results") is None:
+        return
+    
+    diagnostics = st.session_state["diagnostics"]
+    text_hash, analyzed_accuracy, history_version = st.session_state["results_key"]
+    if (history_version is not None) != use_history:
+        st.info("分析设置已更改，点击「开始分析」更新结果")
+    elif analyzed_accuracy != min_accuracy:
+        # 分数线只决定从预先算好的结果中取哪一份，不重新解析和分类
+        diagnostics.timings.pop("threshold", None)
+        with diagnostics.stage("threshold"):
+            st.session_state["results"] = st.session_state["outcomes"].results(min_accuracy, True)
+        st.session_state["results_key"] = (text_hash, min_accuracy, history_version)
+    results_fragment()
+    
+    st.markdown("---")
+    export_fragment()
+    
+    if show_diagnostics:
+        with diagnostics_panel:
+            display_diagnostics(diagnostics, st.session_state.get("profile"))
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,184 @@
+"""词测&练习分析工具命令行版 - 批量分析导出的文本文件，不依赖 Streamlit
+
+用法示例:
+    python vocab_cli.py exports/ --min-accuracy 94 --format csv -o 结果.csv
+    python vocab_cli.py 周一.txt 周二.txt --merge --show-failed
+    python vocab_cli.py 周二.txt --diff-against 周一.txt --format csv -o 变化.csv
+"""
+import argparse
+from functools import partial
+import json
+import os
+from pathlib import Path
+import sys
+
+from vocab_core import (
+    EXPORT_WRITERS, Diagnostics, HistoryStore, build_history, classify_entries, count_failed_attempts, diff_parsed,
+    parse_sources, write_coverage_csv, write_diff_csv
+)
+
+OUTPUT_FORMATS = ("jsonl",) + tuple(EXPORT_WRITERS)
+DIFF_FORMATS = ("jsonl", "csv")  # --diff-against 支持的输出格式
+
+def collect_files(paths, pattern):
+    """展开目录，按路径顺序返回所有待分析文件"""
+    files = []
+    for path in map(Path, paths):
+        if path.is_dir():
+            files.extend(sorted(p for p in path.glob(pattern) if p.is_file()))
+        else:
+            files.append(path)
+    return files
+
+def analyze_files(files, min_accuracy=94, show_failed=False, merge=False, workers=1, history_store=None,
+                  encoding="utf-8-sig", diagnostics=None):
+    """逐个文件分析，返回 [(文件, results), ...]
+
+    merge 为真时所有文件共用一份 history，重试次数跨文件统计；传入 history_store 时
+    先导入全部文件，重试次数按历史库（含本次所有文件）统计。
+    """
+    if diagnostics is None:
+        diagnostics = Diagnostics()
+
+    with diagnostics.stage("parse"):
+        parsed_files = []
+        for parsed, entries, stats in parse_sources(files, workers, encoding):
+            parsed_files.append(parsed)
+            diagnostics.count_parsed(parsed, entries)
+            diagnostics.counters.update(stats)
+    diagnostics.counters["files"] += len(files)
+
+    failed_counts = None  # 不合并也不用历史库时每个文件只按自己的记录统计
+    if merge or history_store is not None:
+        with diagnostics.stage("history"):
+            history = build_history(parsed for parsed_file in parsed_files for parsed in parsed_file)
+        if history_store is not None:
+            # 先导入全部文件再一次查询所有 key，重试次数与文件顺序无关
+            with diagnostics.stage("history_store"):
+                for parsed in parsed_files:
+                    history_store.ingest(parsed)
+                history = history_store.history(history.keys())
+        with diagnostics.stage("history"):
+            # 未通过次数只统计一次，各文件共用
+            failed_counts = count_failed_attempts(history, min_accuracy)
+
+    analyzed = []
+    with diagnostics.stage("classify"):
+        for path, parsed in zip(files, parsed_files):
+            analyzed.append((path, classify_entries(parsed, min_accuracy, show_failed, failed_counts=failed_counts)))
+    return analyzed
+
+def diff_files(baseline, files, min_accuracy=94, workers=1, encoding="utf-8-sig", diagnostics=None):
+    """把 files 合并后与 baseline 文件对比，返回 diff_parsed 的变化行"""
+    if diagnostics is None:
+        diagnostics = Diagnostics()
+
+    sides = []
+    for paths in (baseline, files):
+        with diagnostics.stage("parse"):
+            parsed = []
+            for parsed_file, entries, stats in parse_sources(paths, workers, encoding):
+                parsed.extend(parsed_file)
+                diagnostics.count_parsed(parsed_file, entries)
+                diagnostics.counters.update(stats)
+        sides.append(parsed)
+    diagnostics.counters["files"] += len(baseline) + len(files)
+
+    with diagnostics.stage("diff"):
+        return diff_parsed(*sides, min_accuracy)
+
+def write_diff(diff, fmt, stream):
+    if fmt == "csv":
+        write_diff_csv(diff, stream)
+    else:
+        for row in diff:
+            stream.write(json.dumps(row, ensure_ascii=False).encode("utf-8") + b"\n")
+
+def write_jsonl(analyzed, stream):
+    for path, results in analyzed:
+        for student in results:
+            record = dict(student, file=str(path))
+            stream.write(json.dumps(record, ensure_ascii=False).encode("utf-8") + b"\n")
+
+def write_output(analyzed, fmt, stream):
+    if fmt == "jsonl":
+        write_jsonl(analyzed, stream)
+    else:
+        EXPORT_WRITERS[fmt]([student for _, results in analyzed for student in results], stream)
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="批量分析 Study 系统导出的班级学习动态")
+    parser.add_argument("paths", nargs="+", help="导出的文本文件或目录")
+    parser.add_argument("--min-accuracy", type=int, default=94, help="词测通过分数线 (%%)，默认 94")
+    parser.add_argument("--show-failed", action="store_true", help="输出只有未通过词测的学生")
+    parser.add_argument("--format", choices=OUTPUT_FORMATS, default="jsonl", help="输出格式，默认 jsonl")
+    parser.add_argument("-o", "--output", default="-", help="输出文件，默认标准输出")
+    parser.add_argument("--pattern", default="*.txt", help="目录中匹配的文件名，默认 *.txt")
+    parser.add_argument("--merge", action="store_true", help="跨文件统计重试次数")
+    parser.add_argument("--history-db", help="SQLite 历史库路径，重试次数统计以前导入的记录")
+    parser.add_argument("--coverage-output", metavar="PATH", help="另把每个学生合并后的已通过范围写成 CSV（不用于 --diff-against）")
+    parser.add_argument("--diff-against", nargs="+", metavar="PATH",
+                        help="改为输出与这些文件（或目录）相比每个学生的变化，仅支持 jsonl / csv")
+    parser.add_argument("--encoding", default="utf-8-sig", help="输入文件编码，默认 utf-8-sig")
+    parser.add_argument("-j", "--workers", type=int, default=os.cpu_count() or 1, help="并行解析的进程数（文件合计较小时串行）")
+    parser.add_argument("--diagnostics", action="store_true", help="把各阶段耗时和计数以 JSON 写到标准错误")
+    return parser
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+
+    files = collect_files(args.paths, args.pattern)
+    missing = [str(path) for path in files if not path.is_file()]
+    if missing:
+        print(f"找不到文件: {', '.join(missing)}", file=sys.stderr)
+        return 2
+    if not files:
+        print("没有找到要分析的文件", file=sys.stderr)
+        return 2
+
+    diagnostics = Diagnostics()
+    if args.diff_against:
+        baseline = collect_files(args.diff_against, args.pattern)
+        missing = [str(path) for path in baseline if not path.is_file()]
+        if missing or not baseline:
+            print(f"找不到对比基准文件: {', '.join(missing) or ' '.join(args.diff_against)}", file=sys.stderr)
+            return 2
+        if args.format not in DIFF_FORMATS:
+            print(f"--diff-against 只支持 {' / '.join(DIFF_FORMATS)} 格式", file=sys.stderr)
+            return 2
+        diff = diff_files(baseline, files, args.min_accuracy, args.workers, args.encoding, diagnostics)
+        write = partial(write_diff, diff, args.format)
+    else:
+        history_store = HistoryStore(args.history_db) if args.history_db else None
+        try:
+            analyzed = analyze_files(
+                files, args.min_accuracy, args.show_failed, args.merge, args.workers, history_store, args.encoding,
+                diagnostics
+            )
+        finally:
+            if history_store is not None:
+                history_store.close()
+        write = partial(write_output, analyzed, args.format)
+        if args.coverage_output:
+            with diagnostics.stage("coverage"), open(args.coverage_output, "wb") as f:
+                write_coverage_csv([student for _, results in analyzed for student in results], f)
+
+    with diagnostics.stage("write"):
+        if args.output == "-":
+            try:
+                write(sys.stdout.buffer)
+                sys.stdout.buffer.flush()
+            except BrokenPipeError:
+                # 下游（如 head）提前关闭了管道，避免退出时再次报错
+                os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+                return 1
+        else:
+            with open(args.output, "wb") as f:
+                write(f)
+
+    if args.diagnostics:
+        print(json.dumps(diagnostics.to_dict(), ensure_ascii=False), file=sys.stderr)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
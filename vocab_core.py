@@ -0,0 +1,1833 @@
+"""词测&练习分析核心 - 解析、分类和列式存储，不依赖 Streamlit
+
+模块加载时只导入轻量的标准库；多进程、SQLite、CSV 以及 NumPy / pyarrow / openpyxl
+都在用到的函数里再导入，保证 worker 和命令行的冷启动足够快
+（见 benchmarks/import_time.py）。
+"""
+import re
+from bisect import bisect_left, bisect_right
+from collections import Counter, OrderedDict, defaultdict
+from array import array
+import codecs
+from contextlib import contextmanager
+from functools import partial
+import hashlib
+import io
+import json
+import logging
+import os
+import threading
+import time
+
+CHUNK_SIZE = 1 << 16  # 流式读取的块大小（字符数）
+PROGRESS_INTERVAL = 500  # 每解析多少个学生块回调一次进度
+PARALLEL_MIN_ENTRIES = 5000  # 学生块少于此数时不启用多进程
+FALLBACK_ENCODING = "gb18030"  # 不是 UTF-8 的上传文件按此解码（中文 Windows 记事本、WPS 保存的 "ANSI" 文本）
+PARALLEL_MIN_BYTES = 4 * 1024 * 1024  # 多个导出文件合计小于此大小（约 5000 个学生块）时不启用多进程
+SHARDS_PER_WORKER = 4  # 每个 worker 分到的分片数
+PARALLEL_START_METHOD = "spawn"  # Streamlit 服务是多线程的，fork 不安全
+PROFILE_TOP_N = 40  # 性能剖析报告中列出的条目数
+ENTRY_CACHE_ENTRIES = 200000  # 学生块解析缓存的条目上限
+
+LOGGER = logging.getLogger("vocab_analyzer")
+
+def configure_logging(level="INFO", stream=None):
+    """给 vocab_analyzer 日志加一个只输出消息本身（每行一条 JSON）的处理器，默认写到标准错误
+
+    重复调用只替换级别和输出流，不会重复输出。不再向根日志传播，避免宿主的日志配置再输出一遍。
+    """
+    handler = next((h for h in LOGGER.handlers if getattr(h, "vocab_analyzer", False)), None)
+    if handler is not None:
+        LOGGER.removeHandler(handler)
+    handler = logging.StreamHandler(stream)
+    handler.vocab_analyzer = True
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    LOGGER.addHandler(handler)
+    LOGGER.setLevel(level)
+    LOGGER.propagate = False
+    return handler
+
+class LRUCache:
+    """线程安全的有界缓存，超出 max_entries 时淘汰最久未用的条目，ttl 秒后过期"""
+
+    def __init__(self, max_entries, ttl=None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return default
+            stored_at, value = item
+            if self.ttl is not None and time.monotonic() - stored_at > self.ttl:
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def put(self, key, value):
+        with self._lock:
+            self._data[key] = (time.monotonic(), value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def __len__(self):
+        return len(self._data)
+
+class Diagnostics:
+    """分阶段耗时和计数器，to_dict() 的结果可直接序列化为 JSON"""
+
+    def __init__(self):
+        self.timings = {}
+        self.counters = Counter()
+
+    def add_time(self, stage, seconds):
+        self.timings[stage] = self.timings.get(stage, 0.0) + seconds
+
+    @contextmanager
+    def stage(self, name):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(name, time.perf_counter() - started)
+
+    def count_parsed(self, parsed, entries):
+        self.counters["entries"] += entries
+        self.counters["students"] += len(parsed)
+        self.counters["tests"] += sum(len(tests) for _, tests, _ in parsed)
+        self.counters["cards"] += sum(len(cards) for _, _, cards in parsed)
+
+    def to_dict(self):
+        return {
+            "timings": {stage: round(seconds, 6) for stage, seconds in self.timings.items()},
+            "counters": dict(self.counters)
+        }
+
+    def log(self, **extra):
+        """以一行 JSON 写入 vocab_analyzer 日志"""
+        LOGGER.info(json.dumps(dict(self.to_dict(), **extra), ensure_ascii=False))
+
+def profile_call(func, *args, **kwargs):
+    """在 cProfile 和 tracemalloc 下运行 func，返回 (结果, 文本报告, pstats 原始数据)
+
+    pstats 原始数据可以用 pstats.Stats / snakeviz 打开。
+    """
+    import cProfile
+    import marshal
+    import pstats
+    import tracemalloc
+
+    profiler = cProfile.Profile()
+    tracing = tracemalloc.is_tracing()
+    if not tracing:
+        tracemalloc.start()
+    try:
+        result = profiler.runcall(func, *args, **kwargs)
+        current, peak = tracemalloc.get_traced_memory()
+        snapshot = tracemalloc.take_snapshot()
+    finally:
+        if not tracing:
+            tracemalloc.stop()
+
+    report = io.StringIO()
+    report.write(f"tracemalloc: 当前 {current / 1e6:.2f} MB，峰值 {peak / 1e6:.2f} MB\n\n")
+    for stat in snapshot.statistics("lineno")[:PROFILE_TOP_N]:
+        report.write(f"{stat}\n")
+    report.write("\n")
+    pstats.Stats(profiler, stream=report).sort_stats("cumulative").print_stats(PROFILE_TOP_N)
+
+    profiler.create_stats()
+    return result, report.getvalue(), marshal.dumps(profiler.stats)
+
+# 解析用正则 - 模块加载时编译一次
+ENTRY_SPLIT_RE = re.compile(r'\n\s*\n')
+NAME_RE = re.compile(r'^(.+?)\s*:')
+RECORD_RE = re.compile(r'【(词测|题卡) (.+?)】:\s*(.+?)(?:,\s*|$)')
+RANGE_RE = re.compile(r'(\d+~\d+)|(?<!\d)(\d+)(?!\d)')
+WORD_COUNT_RE = re.compile(r'词数：(\d+)')
+ACCURACY_RE = re.compile(r'正确率：(\d+)%')
+TIME_RE = re.compile(r'平均反应时间：([\d.]+)\s*s')
+ERRORS_RE = re.compile(r'错误个数：(\d+)')
+CARD_INITIAL_RE = re.compile(r'错误个数: (\d+)/(\d+)')
+CARD_CORRECTED_RE = re.compile(r'订正后错误个数: (\d+)/(\d+)')
+
+def extract_test_info(test_str):
+    test_type = "听测" if "听测" in test_str else "看测"
+    range_match = RANGE_RE.search(test_str)
+    test_range = range_match.group() if range_match else "未知范围"
+    return test_type, test_range
+
+def extract_word_list(test_info, test_type):
+    """"托福核心-英义-所有义-看测-2601~2700-100" -> "托福核心-英义-所有义"，没有词表名时为 "未知词表"。"""
+    end = test_info.find(test_type)
+    if end < 0:
+        range_match = RANGE_RE.search(test_info)
+        end = range_match.start() if range_match else len(test_info)
+    return test_info[:end].strip(" -") or "未知词表"
+
+def parse_entry(entry, stats=None):
+    """解析单个学生块 - 返回 (姓名, 词测记录, 题卡记录)，无法识别时返回 None
+
+    词测记录为 (测试类型, 范围, 正确率, 词数, 反应时间, 错误数, 词表)，字段不全的记录
+    词数为 None：它仍计入重试次数，但不显示。传入 stats (Counter) 时统计被跳过的记录。
+    """
+    if not entry:
+        return None
+
+    name_match = NAME_RE.match(entry)
+    if not name_match:
+        if stats is not None:
+            stats["unmatched_entries"] += 1
+        return None
+
+    full_name = name_match.group(1).strip()
+    tests = []
+    cards = []
+
+    for record_type, test_info, test in RECORD_RE.findall(entry):
+        if record_type == "词测":
+            if "正在进行" in test:
+                if stats is not None:
+                    stats["in_progress_tests"] += 1
+                continue
+
+            accuracy = ACCURACY_RE.search(test)
+            if not accuracy:
+                if stats is not None:
+                    stats["unmatched_tests"] += 1
+                continue
+
+            test_type, test_range = extract_test_info(test_info)
+            word_list = extract_word_list(test_info, test_type)
+            word_count = WORD_COUNT_RE.search(test)
+            time_taken = TIME_RE.search(test)
+            errors = ERRORS_RE.search(test)
+
+            if word_count and time_taken and errors:
+                tests.append((test_type, test_range, int(accuracy.group(1)),
+                              int(word_count.group(1)), float(time_taken.group(1)),
+                              int(errors.group(1)), word_list))
+            else:
+                tests.append((test_type, test_range, int(accuracy.group(1)), None, None, None, word_list))
+                if stats is not None:
+                    stats["incomplete_tests"] += 1
+
+        else:
+            initial_errors = CARD_INITIAL_RE.search(test)
+            if not initial_errors:
+                if stats is not None:
+                    stats["unmatched_cards"] += 1
+                continue
+
+            card_type = "SAT" if "[SAT]" in test_info else "TOEFL"
+            wrong = int(initial_errors.group(1))
+            total = int(initial_errors.group(2))
+            card_data = {
+                "name": test_info.split('] ')[-1].strip(),
+                "initial_wrong": wrong,
+                "total": total,
+                "initial_accuracy": round((total - wrong) / total * 100) if total > 0 else 0,
+                "corrected_wrong": None,
+                "corrected_accuracy": None,
+                "status": "已完成" if "已完成" in test else "正在进行"
+            }
+
+            corrected_errors = CARD_CORRECTED_RE.search(test)
+            if corrected_errors:
+                corrected_wrong = int(corrected_errors.group(1))
+                card_data.update({
+                    "corrected_wrong": corrected_wrong,
+                    "corrected_accuracy": round((total - corrected_wrong) / total * 100) if total > 0 else 0
+                })
+
+            cards.append((card_type, card_data))
+
+    return full_name, tests, cards
+
+def parse_text(text, progress=None, diagnostics=None):
+    """一次遍历解析全部学生块，结果与分数线无关
+
+    progress(已处理块数, 已处理字符数) 每 PROGRESS_INTERVAL 块回调一次，结束时再回调一次。
+    传入 diagnostics 时记录分块 (split) 和逐块解析 (parse_entries) 的耗时及计数。
+    """
+    clock = time.perf_counter
+    started = clock()
+    entry_time = 0.0
+    stats = diagnostics.counters if diagnostics is not None else None
+
+    parsed = []
+    stripped = text.strip()
+    offset = len(text) - len(text.lstrip())
+    entries = 0
+    start = 0
+
+    for match in ENTRY_SPLIT_RE.finditer(stripped):
+        entry_started = clock()
+        parsed_entry = parse_entry(stripped[start:match.start()], stats)
+        entry_time += clock() - entry_started
+        if parsed_entry is not None:
+            parsed.append(parsed_entry)
+        start = match.end()
+        entries += 1
+        if progress is not None and entries % PROGRESS_INTERVAL == 0:
+            progress(entries, offset + start)
+
+    entry_started = clock()
+    parsed_entry = parse_entry(stripped[start:], stats)
+    entry_time += clock() - entry_started
+    if parsed_entry is not None:
+        parsed.append(parsed_entry)
+    if progress is not None:
+        progress(entries + 1, len(text))
+
+    if diagnostics is not None:
+        diagnostics.add_time("split", clock() - started - entry_time)
+        diagnostics.add_time("parse_entries", entry_time)
+        diagnostics.count_parsed(parsed, entries + 1)
+    return parsed
+
+def build_history(parsed, history=None):
+    """按 (姓名, 测试类型, 范围) 汇总所有词测正确率"""
+    if history is None:
+        history = defaultdict(list)
+    for full_name, tests, _ in parsed:
+        for test_type, test_range, accuracy, *_ in tests:
+            history[(full_name, test_type, test_range)].append(accuracy)
+    return history
+
+def count_failed_attempts(history, min_accuracy, keys=None):
+    """统计每个 key 低于分数线的次数，keys 为空时统计全部"""
+    if keys is None:
+        keys = history.keys()
+    return {key: sum(1 for a in history.get(key, ()) if a < min_accuracy) for key in keys}
+
+def retry_accuracy_str(accuracy_val, failed_count, min_accuracy):
+    """正确率后追加 * 号，每个 * 表示一次其它未通过的尝试"""
+    if accuracy_val < min_accuracy:
+        failed_count = max(0, failed_count - 1)
+    return f"{accuracy_val}%{'*' * failed_count}"
+
+def has_results(student_data, show_failed):
+    return bool(student_data["passed"] or (show_failed and student_data["failed"]) or student_data["question_cards"]["SAT"] or student_data["question_cards"]["TOEFL"])
+
+def classify_entry(parsed_entry, min_accuracy, failed_counts):
+    """把单个已解析的学生块转换为 student_data"""
+    full_name, tests, cards = parsed_entry
+    student_data = {
+        "name": full_name,
+        "passed": [],
+        "failed": [],
+        "question_cards": {
+            "SAT": [],
+            "TOEFL": []
+        }
+    }
+
+    for test_type, test_range, accuracy_val, word_count, reaction_time, errors, word_list in tests:
+        if word_count is None:
+            continue
+
+        failed_count = failed_counts.get((full_name, test_type, test_range), 0)
+        test_data = {
+            "word_list": word_list,
+            "type": test_type,
+            "range": test_range,
+            "count": word_count,
+            "accuracy": accuracy_val,
+            "time": reaction_time,
+            "errors": errors,
+            "accuracy_str": retry_accuracy_str(accuracy_val, failed_count, min_accuracy)
+        }
+
+        if accuracy_val >= min_accuracy:
+            student_data["passed"].append(test_data)
+        else:
+            student_data["failed"].append(test_data)
+
+    for card_type, card_data in cards:
+        student_data["question_cards"][card_type].append(dict(card_data))
+
+    return student_data
+
+def classify_entries(parsed, min_accuracy=94, show_failed=False, history=None, failed_counts=None):
+    """按分数线划分通过/未通过，并计算带重试标记的正确率
+
+    多批 parsed 共用同一份 history 时，可以先用 count_failed_attempts 统计一次再作为 failed_counts 传入。
+    """
+    if failed_counts is None:
+        if history is None:
+            history = build_history(parsed)
+        # 每个 key 的未通过次数只统计一次
+        failed_counts = count_failed_attempts(history, min_accuracy)
+
+    results = []
+    for parsed_entry in parsed:
+        student_data = classify_entry(parsed_entry, min_accuracy, failed_counts)
+        if has_results(student_data, show_failed):
+            results.append(student_data)
+
+    return results
+
+def analyze_data(text, min_accuracy=94, show_failed=False, progress=None, history_store=None, diagnostics=None):
+    """核心分析函数 - 提取词测和题卡数据
+
+    传入 history_store (HistoryStore) 时，本次记录先去重写入，重试次数按库中全部历史计算。
+    传入 diagnostics (Diagnostics) 时记录各阶段耗时和计数。
+    """
+    if diagnostics is None:
+        diagnostics = Diagnostics()
+
+    parsed = parse_text(text, progress, diagnostics)
+    with diagnostics.stage("history"):
+        history = build_history(parsed)
+        if history_store is not None:
+            history_store.ingest(parsed)
+            history = history_store.history(history.keys())
+    with diagnostics.stage("classify"):
+        return classify_entries(parsed, min_accuracy, show_failed, history)
+
+def iter_entries(stream, chunk_size=CHUNK_SIZE, encoding="utf-8", progress=None):
+    """按块读取文本流，逐个产出学生块，与 ENTRY_SPLIT_RE.split(text.strip()) 结果一致
+
+    只有后面已经出现非空白字符的分隔符才算完整，所以跨块的分隔符不会被切错。
+    二进制流按 encoding 增量解码。progress(已产出块数, 已读取字节数) 在每读完
+    一块后回调，文本流按字符计数。
+    """
+    decoder = None
+    buffer = ""
+    started = False
+    entries = 0
+    processed = 0
+
+    while True:
+        chunk = stream.read(chunk_size)
+        if not chunk:
+            break
+        processed += len(chunk)
+        if isinstance(chunk, bytes):
+            if decoder is None:
+                decoder = codecs.getincrementaldecoder(encoding)()
+            chunk = decoder.decode(chunk)
+
+        buffer += chunk
+        if not started:
+            buffer = buffer.lstrip()
+            started = bool(buffer)
+
+        cut = len(buffer.rstrip())
+        parts = ENTRY_SPLIT_RE.split(buffer[:cut])
+        yield from parts[:-1]
+        buffer = parts[-1] + buffer[cut:]
+        entries += len(parts) - 1
+        if progress is not None:
+            progress(entries, processed)
+
+    if decoder is not None:
+        buffer += decoder.decode(b"", final=True)
+    buffer = buffer.strip()
+    if buffer or not started:
+        parts = ENTRY_SPLIT_RE.split(buffer)
+        yield from parts
+        entries += len(parts)
+    if progress is not None:
+        progress(entries, processed)
+
+def analyze_data_iter(stream, min_accuracy=94, show_failed=False, history=None, progress=None, encoding="utf-8"):
+    """流式分析 - 每个学生块结束即产出对应的 student_data
+
+    重试 * 号只统计已读到的尝试；同一学生的块出现多次时，遍历结束后用
+    settle_retry_counts(results, history, min_accuracy) 补全。传入的 history（defaultdict(list)）
+    会被原地累积。progress 和 encoding 的含义同 iter_entries。
+    """
+    if history is None:
+        history = defaultdict(list)
+
+    for entry in iter_entries(stream, progress=progress, encoding=encoding):
+        parsed_entry = parse_entry(entry)
+        if parsed_entry is None:
+            continue
+
+        build_history([parsed_entry], history)
+        full_name, tests, _ = parsed_entry
+        keys = {(full_name, test[0], test[1]) for test in tests}
+        student_data = classify_entry(parsed_entry, min_accuracy, count_failed_attempts(history, min_accuracy, keys))
+        if has_results(student_data, show_failed):
+            yield student_data
+
+def settle_retry_counts(results, history, min_accuracy=94):
+    """按完整的 history 重新计算 accuracy_str（原地修改）"""
+    failed_counts = count_failed_attempts(history, min_accuracy)
+    for student in results:
+        for test in student["passed"] + student["failed"]:
+            failed_count = failed_counts.get((student["name"], test["type"], test["range"]), 0)
+            test["accuracy_str"] = retry_accuracy_str(test["accuracy"], failed_count, min_accuracy)
+    return results
+
+
+
+def parse_blocks(entries):
+    """进程池任务：逐块解析，返回与 entries 对齐的 [(parse_entry 结果, 跳过记录计数或 None), ...]"""
+    stats = Counter()
+    results = []
+    for entry in entries:
+        parsed_entry = parse_entry(entry, stats)
+        results.append((parsed_entry, dict(stats) if stats else None))
+        stats.clear()
+    return results
+
+def shard_entries(entries, max_workers):
+    """按顺序把学生块切成约 max_workers * SHARDS_PER_WORKER 片"""
+    shard_size = max(1, -(-len(entries) // (max_workers * SHARDS_PER_WORKER)))
+    return [entries[i:i + shard_size] for i in range(0, len(entries), shard_size)]
+
+def process_map(func, tasks, max_workers):
+    """在进程池中执行 func，按 tasks 的顺序逐个产出 (task, 结果)；进程池只在迭代期间存在
+
+    所有多进程解析都经过这里：解析是纯 Python，线程池受 GIL 限制没有收益。
+    """
+    from concurrent.futures import ProcessPoolExecutor
+    import multiprocessing
+
+    tasks = list(tasks)
+    if not tasks:
+        return
+    context = multiprocessing.get_context(PARALLEL_START_METHOD)
+    with ProcessPoolExecutor(min(max_workers, len(tasks)), mp_context=context) as pool:
+        yield from zip(tasks, pool.map(func, tasks))
+
+def parse_text_parallel(text, max_workers=None, progress=None, min_entries=PARALLEL_MIN_ENTRIES, diagnostics=None):
+    """多进程解析，返回 (parsed, history)，与 parse_text + build_history 的结果完全一致
+
+    学生块按顺序分片交给进程池，结果按分片顺序拼接后再汇总 history。
+    学生块少于 min_entries 或只有一个 worker 时直接串行解析。
+    """
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+    if diagnostics is None:
+        diagnostics = Diagnostics()
+
+    started = time.perf_counter()
+    entries = ENTRY_SPLIT_RE.split(text.strip())
+    if max_workers <= 1 or len(entries) < min_entries:
+        del entries
+        parsed = parse_text(text, progress, diagnostics)
+        with diagnostics.stage("history"):
+            return parsed, build_history(parsed)
+
+    entry_count = len(entries)
+    shards = shard_entries(entries, max_workers)
+    del entries
+
+    parsed = []
+    done = 0
+    processed = 0
+    split_done = time.perf_counter()
+    for shard, shard_results in process_map(parse_blocks, shards, max_workers):
+        for parsed_entry, stats in shard_results:
+            if parsed_entry is not None:
+                parsed.append(parsed_entry)
+            if stats:
+                diagnostics.counters.update(stats)
+        done += len(shard)
+        processed += sum(map(len, shard))
+        if progress is not None:
+            progress(done, processed)
+
+    if progress is not None:
+        progress(done, len(text))
+    diagnostics.add_time("split", split_done - started)
+    diagnostics.add_time("parse_entries", time.perf_counter() - split_done)
+    diagnostics.count_parsed(parsed, entry_count)
+    diagnostics.counters["workers"] = max_workers
+    with diagnostics.stage("history"):
+        return parsed, build_history(parsed)
+
+class IncrementalParser:
+    """按学生块记忆解析结果 - 追加或修改粘贴内容后只解析新增和改动的块
+
+    学生块以原文为 key 存在有界的 LRUCache 中，同一个 entry_cache 可以在多个解析器间共享；
+    history 按前后两次文本的块差异增量更新。每次 parse 返回新的 history dict，
+    之前返回的结果不会被修改。新增块不少于 min_entries 且 max_workers > 1 时多进程解析。
+    """
+
+    def __init__(self, entry_cache=None, max_workers=1, min_entries=PARALLEL_MIN_ENTRIES):
+        self.entry_cache = entry_cache if entry_cache is not None else LRUCache(ENTRY_CACHE_ENTRIES)
+        self.max_workers = max_workers
+        self.min_entries = min_entries
+        self._blocks = {}  # 上次文本中的学生块 -> (解析结果, 跳过记录计数)
+        self._counts = Counter()  # 上次文本中每个学生块出现的次数
+        self._history = {}
+
+    def _parse_misses(self, misses, progress, done, processed):
+        if self.max_workers <= 1 or len(misses) < self.min_entries:
+            stats = Counter()
+            for entry in misses:
+                yield entry, (parse_entry(entry, stats), dict(stats) if stats else None)
+                stats.clear()
+                done += 1
+                processed += len(entry)
+                if progress is not None and done % PROGRESS_INTERVAL == 0:
+                    progress(done, processed)
+            return
+
+        for shard, shard_results in process_map(parse_blocks, shard_entries(misses, self.max_workers), self.max_workers):
+            yield from zip(shard, shard_results)
+            done += len(shard)
+            processed += sum(map(len, shard))
+            if progress is not None:
+                progress(done, processed)
+
+    def parse(self, text, progress=None, diagnostics=None):
+        """返回 (parsed, history)，与 parse_text + build_history 相同（history 中正确率的顺序可能不同）
+
+        progress(已处理块数, 已处理字符数) 的含义同 parse_text，复用的块一开始就计为已处理。
+        """
+        if diagnostics is None:
+            diagnostics = Diagnostics()
+
+        started = time.perf_counter()
+        entries = ENTRY_SPLIT_RE.split(text.strip())
+        counts = Counter(entries)
+        blocks = {}
+        misses = []
+        for entry in counts:
+            cached = self._blocks.get(entry)
+            if cached is None:
+                cached = self.entry_cache.get(entry)
+            if cached is None:
+                misses.append(entry)
+            else:
+                blocks[entry] = cached
+        diagnostics.add_time("split", time.perf_counter() - started)
+        diagnostics.counters["entry_cache_hits"] += len(blocks)
+        diagnostics.counters["entry_cache_misses"] += len(misses)
+
+        with diagnostics.stage("parse_entries"):
+            done = sum(counts[entry] for entry in blocks)
+            processed = sum(len(entry) * counts[entry] for entry in blocks)
+            for entry, result in self._parse_misses(misses, progress, done, processed):
+                blocks[entry] = result
+                self.entry_cache.put(entry, result)
+            if progress is not None:
+                progress(len(entries), len(text))
+
+        with diagnostics.stage("history"):
+            # 写时复制：上次返回的 history 中的列表不会被原地修改
+            previous = self._history
+            history = dict(previous)
+            emptied = []
+            for entry, times in (self._counts - counts).items():
+                parsed_entry = self._blocks[entry][0]
+                if parsed_entry is None:
+                    continue
+                full_name, tests, _ = parsed_entry
+                for test_type, test_range, accuracy, *_ in tests * times:
+                    key = (full_name, test_type, test_range)
+                    attempts = history[key]
+                    if attempts is previous.get(key):
+                        attempts = history[key] = list(attempts)
+                    attempts.remove(accuracy)
+                    if not attempts:
+                        emptied.append(key)
+            for entry, times in (counts - self._counts).items():
+                parsed_entry = blocks[entry][0]
+                if parsed_entry is None:
+                    continue
+                full_name, tests, _ = parsed_entry
+                for test_type, test_range, accuracy, *_ in tests * times:
+                    key = (full_name, test_type, test_range)
+                    attempts = history.get(key)
+                    if attempts is None:
+                        history[key] = [accuracy]
+                    elif attempts is previous.get(key):
+                        history[key] = attempts + [accuracy]
+                    else:
+                        attempts.append(accuracy)
+            for key in emptied:
+                if not history.get(key, True):
+                    del history[key]
+
+        parsed = []
+        for entry in entries:
+            parsed_entry, stats = blocks[entry]
+            if parsed_entry is not None:
+                parsed.append(parsed_entry)
+            if stats:
+                diagnostics.counters.update(stats)
+        diagnostics.count_parsed(parsed, len(entries))
+
+        self._blocks, self._counts, self._history = blocks, counts, history
+        return parsed, history
+
+def parse_stream(stream, encoding="utf-8-sig"):
+    """流式解析一个导出文件流，返回 (parse_text 格式的结果, 学生块数, 跳过记录计数)"""
+    stats = Counter()
+    entries = 0
+    parsed = []
+    for entry in iter_entries(stream, encoding=encoding):
+        entries += 1
+        parsed_entry = parse_entry(entry, stats)
+        if parsed_entry is not None:
+            parsed.append(parsed_entry)
+    return parsed, entries, stats
+
+def parse_source(source, encoding="utf-8-sig", fallback_encoding=None):
+    """解析一个导出文件 - source 为路径或 bytes，返回值同 parse_stream
+
+    路径用 mmap 只读映射后分块解码，文件内容不会整份复制进进程内存。按 encoding 解码失败
+    且给了 fallback_encoding 时整份改用它重新解析，仍失败时抛出 UnicodeDecodeError。
+    """
+    if fallback_encoding is not None:
+        try:
+            return parse_source(source, encoding)
+        except UnicodeDecodeError:
+            return parse_source(source, fallback_encoding)
+
+    if isinstance(source, (bytes, bytearray)):
+        return parse_stream(io.BytesIO(source), encoding)
+
+    import mmap
+
+    with open(source, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return parse_stream(f, encoding)
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            return parse_stream(mapped, encoding)
+
+def source_size(source):
+    return len(source) if isinstance(source, (bytes, bytearray)) else os.path.getsize(source)
+
+def parse_sources(sources, max_workers=None, encoding="utf-8-sig", progress=None, min_bytes=PARALLEL_MIN_BYTES,
+                  fallback_encoding=None):
+    """并发解析多个导出文件，按输入顺序返回 [parse_source 的结果, ...]
+
+    多于一个文件且 max_workers > 1 时每个文件交给进程池的一个任务；文件合计小于 min_bytes 时
+    启动进程池比解析本身还慢，直接串行。progress(已完成文件数, 已处理字节数) 每完成一个文件回调一次。
+    fallback_encoding 的含义同 parse_source。
+    """
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+    sources = list(sources)
+    sizes = [source_size(source) for source in sources]
+    task = partial(parse_source, encoding=encoding, fallback_encoding=fallback_encoding)
+    if max_workers <= 1 or len(sources) <= 1 or sum(sizes) < min_bytes:
+        completed = ((source, task(source)) for source in sources)
+    else:
+        completed = process_map(task, sources, max_workers)
+
+    results = []
+    processed = 0
+    for size, (_, result) in zip(sizes, completed):
+        results.append(result)
+        processed += size
+        if progress is not None:
+            progress(len(results), processed)
+    return results
+
+TEST_TYPES = ("听测", "看测")
+CARD_TYPES = ("SAT", "TOEFL")
+CARD_STATUSES = ("已完成", "正在进行")
+ACCURACY_PERCENTILES = (25, 50, 75)  # 班级看板中正确率的分位数
+MIN_ACCURACY_RANGE = (85, 100)  # 支持的词测通过分数线（含两端），每个整数分数线的结果都会预先算好
+THRESHOLD_CACHE_ENTRIES = 4  # 每次分析缓存的不同分数线结果份数
+TIME_PERCENTILES = (50, 90)  # 班级看板中反应时间的分位数
+
+def range_sort_key(test_range):
+    """按范围起点的数值排序，"未知范围" 排最后"""
+    start = test_range.split("~")[0]
+    return (0, int(start), test_range) if start.isdigit() else (1, 0, test_range)
+
+def group_percentiles(groups, values, group_count, percentiles):
+    """分组分位数（线性插值，同 np.percentile）- 一次排序，按分位数而不是按组循环
+
+    返回 (group_count, len(percentiles)) 的数组，没有数据的组为 NaN。
+    """
+    import numpy as np
+
+    counts = np.bincount(groups, minlength=group_count)
+    starts = np.cumsum(counts) - counts
+    ordered = values[np.lexsort((values, groups))].astype(np.float64)
+    result = np.full((group_count, len(percentiles)), np.nan)
+    present = counts > 0
+    base = starts[present]
+    for i, q in enumerate(percentiles):
+        position = (counts[present] - 1) * (q / 100)
+        low = np.floor(position).astype(np.int64)
+        high = np.ceil(position).astype(np.int64)
+        fraction = position - low
+        result[present, i] = ordered[base + low] * (1 - fraction) + ordered[base + high] * fraction
+    return result
+
+def rounded(value, digits=1):
+    """NaN 转为 None，便于 JSON 序列化和表格显示"""
+    return None if value != value else round(float(value), digits)
+
+class ResultStore:
+    """列式结果存储 - 词测和题卡各占一组 array 列，姓名/范围/题卡名做字典编码
+
+    与分数线无关；通过/未通过、重试次数和题卡正确率都用 NumPy 按列计算，
+    to_results() 给出与 classify_entries 相同的 list-of-dicts 视图。
+    """
+
+    def __init__(self):
+        self.names = []
+        self.ranges = []
+        self.word_lists = []
+        self.card_names = []
+        self._name_ids = {}
+        self._range_ids = {}
+        self._word_list_ids = {}
+        self._card_name_ids = {}
+        self._key_ids = {}
+
+        # 每个学生块一行
+        self.entry_name = array('i')
+
+        # 词测，词数为 -1 表示字段不全（只计入重试次数）
+        self.test_entry = array('i')
+        self.test_key = array('i')
+        self.test_type = array('b')
+        self.test_range = array('i')
+        self.test_word_list = array('i')
+        self.test_accuracy = array('q')
+        self.test_count = array('q')
+        self.test_time = array('d')
+        self.test_errors = array('q')
+
+        # 题卡，订正后错误数为 -1 表示没有订正
+        self.card_entry = array('i')
+        self.card_type = array('b')
+        self.card_name = array('i')
+        self.card_wrong = array('q')
+        self.card_total = array('q')
+        self.card_corrected_wrong = array('q')
+        self.card_status = array('b')
+
+    @classmethod
+    def from_parsed(cls, parsed):
+        """由 parse_text 的结果（或逐个产出 parse_entry 结果的迭代器）构建"""
+        store = cls()
+        for parsed_entry in parsed:
+            store.add_entry(parsed_entry)
+        return store
+
+    @classmethod
+    def from_text(cls, text, progress=None):
+        return cls.from_parsed(parse_text(text, progress))
+
+    def __len__(self):
+        return len(self.entry_name)
+
+    @staticmethod
+    def _encode(value, values, ids):
+        code = ids.get(value)
+        if code is None:
+            code = ids[value] = len(values)
+            values.append(value)
+        return code
+
+    def add_entry(self, parsed_entry):
+        full_name, tests, cards = parsed_entry
+        entry = len(self.entry_name)
+        name_id = self._encode(full_name, self.names, self._name_ids)
+        self.entry_name.append(name_id)
+
+        for test_type, test_range, accuracy, word_count, reaction_time, errors, word_list in tests:
+            type_id = TEST_TYPES.index(test_type)
+            range_id = self._encode(test_range, self.ranges, self._range_ids)
+            key = (name_id, type_id, range_id)
+            key_id = self._key_ids.setdefault(key, len(self._key_ids))
+
+            self.test_entry.append(entry)
+            self.test_key.append(key_id)
+            self.test_type.append(type_id)
+            self.test_range.append(range_id)
+            self.test_word_list.append(self._encode(word_list, self.word_lists, self._word_list_ids))
+            self.test_accuracy.append(accuracy)
+            if word_count is None:
+                self.test_count.append(-1)
+                self.test_time.append(0.0)
+                self.test_errors.append(-1)
+            else:
+                self.test_count.append(word_count)
+                self.test_time.append(reaction_time)
+                self.test_errors.append(errors)
+
+        for card_type, card in cards:
+            self.card_entry.append(entry)
+            self.card_type.append(CARD_TYPES.index(card_type))
+            self.card_name.append(self._encode(card["name"], self.card_names, self._card_name_ids))
+            self.card_wrong.append(card["initial_wrong"])
+            self.card_total.append(card["total"])
+            self.card_corrected_wrong.append(-1 if card["corrected_wrong"] is None else card["corrected_wrong"])
+            self.card_status.append(CARD_STATUSES.index(card["status"]))
+
+    def failed_attempts(self, min_accuracy, failures=None, history=None):
+        """每条词测的 * 号个数：同一 (姓名, 类型, 范围) 下其它未通过尝试的次数
+
+        传入 threshold_failures() 的表时直接取对应分数线的一列，不再按 key 重新计数；表只覆盖
+        MIN_ACCURACY_RANGE，超出范围时抛出 ValueError。否则传入 history 时按其中的正确率计数
+        （如历史库），都不传时按本次的全部尝试计数。
+        """
+        import numpy as np
+
+        failed = np.frombuffer(self.test_accuracy, dtype=np.int64) < min_accuracy
+        keys = np.frombuffer(self.test_key, dtype=np.int32)
+        if failures is not None:
+            low, high = MIN_ACCURACY_RANGE
+            if not low <= min_accuracy <= high:
+                raise ValueError(f"分数线 {min_accuracy}% 超出预计算的范围 {low}%~{high}%")
+            per_key = failures[:, min_accuracy - low].astype(np.int64)
+        else:
+            history_keys, accuracy = self._attempt_columns(history)
+            per_key = np.bincount(
+                history_keys, weights=accuracy < min_accuracy, minlength=len(self._key_ids)
+            ).astype(np.int64)
+        return np.maximum(per_key[keys] - failed, 0)
+
+    def _attempt_columns(self, history=None):
+        """(key 编号, 正确率) 两列：传入 history 时取其中属于本存储的 key 的全部正确率，否则取本次的全部尝试"""
+        import numpy as np
+
+        if history is None:
+            return np.frombuffer(self.test_key, dtype=np.int32), np.frombuffer(self.test_accuracy, dtype=np.int64)
+
+        key_ids = array('i')
+        accuracies = array('q')
+        for (full_name, test_type, test_range), values in history.items():
+            key_id = self._key_ids.get((
+                self._name_ids.get(full_name), TEST_TYPES.index(test_type), self._range_ids.get(test_range)
+            ))
+            if key_id is not None:
+                key_ids.extend([key_id] * len(values))
+                accuracies.extend(values)
+        return np.frombuffer(key_ids, dtype=np.int32), np.frombuffer(accuracies, dtype=np.int64)
+
+    def threshold_failures(self, history=None):
+        """每个 (姓名, 类型, 范围) 在 MIN_ACCURACY_RANGE 内每个分数线下的未通过次数 - (key 数, 分数线数) 数组
+
+        正确率落进 "低于最低分数线" 和每个整数分数线各一个桶，按桶累加即前缀计数：第 j 列为
+        正确率低于 MIN_ACCURACY_RANGE[0] + j 的次数。传入 history 时按其中的正确率统计（如历史库），
+        否则按本次的全部尝试统计。
+        """
+        import numpy as np
+
+        low, high = MIN_ACCURACY_RANGE
+        keys, accuracy = self._attempt_columns(history)
+
+        # 桶 0 为低于 low，桶 i 为正确率 low + i - 1，最后一个桶为不低于 high（任何分数线下都不算未通过）
+        buckets = high - low + 2
+        counts = np.bincount(
+            keys.astype(np.int64) * buckets + np.clip(accuracy - low + 1, 0, buckets - 1),
+            minlength=len(self._key_ids) * buckets
+        ).reshape(-1, buckets)
+        return np.cumsum(counts[:, :-1], axis=1).astype(np.int32)
+
+    def pass_rate_curve(self):
+        """班级看板：MIN_ACCURACY_RANGE 内每个分数线下的通过率，每个分数线一行
+
+        按尝试计的通过率、至少通过一次的 (学生, 范围) 比例和有未通过词测的学生数都由
+        正确率直方图的前缀和得到，不随分数线重新扫描记录。
+        """
+        import numpy as np
+
+        if not self.test_key:
+            return []
+        low, high = MIN_ACCURACY_RANGE
+        buckets = high - low + 2
+        accuracy = np.frombuffer(self.test_accuracy, dtype=np.int64)
+        keys = np.frombuffer(self.test_key, dtype=np.int32)
+        names = np.frombuffer(self.entry_name, dtype=np.int32)[np.frombuffer(self.test_entry, dtype=np.int32)]
+
+        key_best = np.full(len(self._key_ids), -1, dtype=np.int64)
+        np.maximum.at(key_best, keys, accuracy)
+        name_worst = np.full(len(self.names), np.iinfo(np.int64).max, dtype=np.int64)
+        np.minimum.at(name_worst, names, accuracy)
+        name_worst = name_worst[name_worst != np.iinfo(np.int64).max]
+
+        def below(values):
+            """每个分数线下低于它的个数"""
+            return np.cumsum(np.bincount(np.clip(values - low + 1, 0, buckets - 1), minlength=buckets))[:-1]
+
+        attempts_below = below(accuracy)
+        keys_below = below(key_best)
+        students_below = below(name_worst)
+        return [
+            {
+                "分数线": threshold,
+                "通过率": rounded((len(accuracy) - attempts_below[j]) / len(accuracy) * 100),
+                "学生通过率": rounded((len(key_best) - keys_below[j]) / len(key_best) * 100),
+                "有未通过词测的学生": int(students_below[j]),
+            }
+            for j, threshold in enumerate(range(low, high + 1))
+        ]
+
+    def card_accuracies(self):
+        """返回 (初次正确率, 订正后正确率)，没有订正的题卡订正后正确率为 -1"""
+        import numpy as np
+
+        total = np.frombuffer(self.card_total, dtype=np.int64)
+        wrong = np.frombuffer(self.card_wrong, dtype=np.int64)
+        corrected_wrong = np.frombuffer(self.card_corrected_wrong, dtype=np.int64)
+        safe_total = np.where(total > 0, total, 1)
+
+        initial = np.where(total > 0, np.round((total - wrong) / safe_total * 100), 0).astype(np.int64)
+        corrected = np.where(total > 0, np.round((total - corrected_wrong) / safe_total * 100), 0).astype(np.int64)
+        corrected = np.where(corrected_wrong >= 0, corrected, -1)
+        return initial, corrected
+
+    def range_summary(self, min_accuracy=94):
+        """班级看板：按 (测试类型, 范围) 汇总全部词测尝试（含字段不全的），每组一行
+
+        重试次数为尝试次数减去学生数；反应时间只统计字段完整的尝试。
+        """
+        import numpy as np
+
+        if not self.test_key:
+            return []
+        type_ids = np.frombuffer(self.test_type, dtype=np.int8).astype(np.int64)
+        range_ids = np.frombuffer(self.test_range, dtype=np.int32)
+        accuracy = np.frombuffer(self.test_accuracy, dtype=np.int64)
+        reaction_time = np.frombuffer(self.test_time, dtype=np.float64)
+        complete = np.frombuffer(self.test_count, dtype=np.int64) >= 0
+        keys = np.frombuffer(self.test_key, dtype=np.int32)
+        passed = accuracy >= min_accuracy
+
+        group_codes, groups = np.unique(type_ids * len(self.ranges) + range_ids, return_inverse=True)
+        group_count = len(group_codes)
+        attempts = np.bincount(groups, minlength=group_count)
+        passes = np.bincount(groups, weights=passed, minlength=group_count)
+        accuracy_sum = np.bincount(groups, weights=accuracy, minlength=group_count)
+
+        # 每个 (姓名, 类型, 范围) 属于唯一一组；按 key 汇总后再落到组上
+        key_group = np.zeros(len(self._key_ids), dtype=np.int64)
+        key_group[keys] = groups
+        key_passed = np.bincount(keys, weights=passed, minlength=len(self._key_ids)) > 0
+        students = np.bincount(key_group, minlength=group_count)
+        students_passed = np.bincount(key_group, weights=key_passed, minlength=group_count)
+
+        accuracy_q = group_percentiles(groups, accuracy, group_count, ACCURACY_PERCENTILES)
+        time_q = group_percentiles(groups[complete], reaction_time[complete], group_count, TIME_PERCENTILES)
+
+        rows = []
+        for group, code in enumerate(group_codes.tolist()):
+            type_id, range_id = divmod(code, len(self.ranges))
+            row = {
+                "测试类型": TEST_TYPES[type_id],
+                "范围": self.ranges[range_id],
+                "学生数": int(students[group]),
+                "尝试次数": int(attempts[group]),
+                "重试次数": int(attempts[group] - students[group]),
+                "通过率": rounded(passes[group] / attempts[group] * 100),
+                "学生通过率": rounded(students_passed[group] / students[group] * 100),
+                "平均正确率": rounded(accuracy_sum[group] / attempts[group]),
+            }
+            for q, value in zip(ACCURACY_PERCENTILES, accuracy_q[group]):
+                row[f"正确率P{q}"] = rounded(value)
+            for q, value in zip(TIME_PERCENTILES, time_q[group]):
+                row[f"反应时间P{q}"] = rounded(value, 2)
+            rows.append(row)
+        rows.sort(key=lambda row: (TEST_TYPES.index(row["测试类型"]), range_sort_key(row["范围"])))
+        return rows
+
+    def card_summary(self):
+        """班级看板：按 (题卡类型, 题卡名) 汇总初次与订正后正确率，每组一行"""
+        import numpy as np
+
+        if not self.card_name:
+            return []
+        initial, corrected = self.card_accuracies()
+        has_corrected = corrected >= 0
+        completed = np.frombuffer(self.card_status, dtype=np.int8) == CARD_STATUSES.index("已完成")
+        codes = (np.frombuffer(self.card_type, dtype=np.int8).astype(np.int64) * len(self.card_names)
+                 + np.frombuffer(self.card_name, dtype=np.int32))
+
+        group_codes, groups = np.unique(codes, return_inverse=True)
+        group_count = len(group_codes)
+        cards = np.bincount(groups, minlength=group_count)
+        completed_cards = np.bincount(groups, weights=completed, minlength=group_count)
+        corrected_cards = np.bincount(groups, weights=has_corrected, minlength=group_count)
+        initial_sum = np.bincount(groups, weights=initial, minlength=group_count)
+        corrected_sum = np.bincount(groups, weights=np.where(has_corrected, corrected, 0), minlength=group_count)
+        initial_median = group_percentiles(groups, initial, group_count, (50,))[:, 0]
+
+        rows = []
+        for group, code in enumerate(group_codes.tolist()):
+            type_id, name_id = divmod(code, len(self.card_names))
+            rows.append({
+                "题卡类型": CARD_TYPES[type_id],
+                "题卡名称": self.card_names[name_id],
+                "份数": int(cards[group]),
+                "已完成": int(completed_cards[group]),
+                "平均初次正确率": rounded(initial_sum[group] / cards[group]),
+                "初次正确率P50": rounded(initial_median[group]),
+                "订正份数": int(corrected_cards[group]),
+                "平均订正后正确率": rounded(corrected_sum[group] / corrected_cards[group])
+                if corrected_cards[group] else None,
+            })
+        return rows
+
+    def class_summary(self, min_accuracy=94):
+        """班级看板的总览指标"""
+        import numpy as np
+
+        names = np.frombuffer(self.entry_name, dtype=np.int32)
+        accuracy = np.frombuffer(self.test_accuracy, dtype=np.int64)
+        complete = np.frombuffer(self.test_count, dtype=np.int64) >= 0
+        reaction_time = np.frombuffer(self.test_time, dtype=np.float64)[complete]
+        failed_entries = np.frombuffer(self.test_entry, dtype=np.int32)[accuracy < min_accuracy]
+        initial, corrected = self.card_accuracies()
+
+        return {
+            "学生数": len(np.unique(names)),
+            "词测次数": len(accuracy),
+            "重试次数": len(accuracy) - len(self._key_ids),
+            "通过率": rounded(np.mean(accuracy >= min_accuracy) * 100) if len(accuracy) else None,
+            "正确率P50": rounded(np.median(accuracy)) if len(accuracy) else None,
+            "反应时间P50": rounded(np.median(reaction_time), 2) if len(reaction_time) else None,
+            "有未通过词测的学生": len(np.unique(names[failed_entries])),
+            "题卡数": len(initial),
+            "平均初次正确率": rounded(initial.mean()) if len(initial) else None,
+            "平均订正后正确率": rounded(corrected[corrected >= 0].mean()) if np.any(corrected >= 0) else None,
+        }
+
+    def visible_entries(self, min_accuracy=94, show_failed=False):
+        """按 has_results 的规则返回每个学生块是否有结果的布尔数组"""
+        import numpy as np
+
+        entries = len(self.entry_name)
+        test_entry = np.frombuffer(self.test_entry, dtype=np.int32)
+        complete = np.frombuffer(self.test_count, dtype=np.int64) >= 0
+        passed = np.frombuffer(self.test_accuracy, dtype=np.int64) >= min_accuracy
+
+        visible = np.bincount(test_entry[complete & passed], minlength=entries) > 0
+        visible |= np.bincount(np.frombuffer(self.card_entry, dtype=np.int32), minlength=entries) > 0
+        if show_failed:
+            visible |= np.bincount(test_entry[complete & ~passed], minlength=entries) > 0
+        return visible
+
+    def to_results(self, min_accuracy=94, show_failed=False, failures=None, history=None):
+        """生成与 classify_entries 相同的 list-of-dicts 视图，供 display_test_table 等使用
+
+        重试次数的来源同 failed_attempts：failures 为 threshold_failures() 的表，history 为历史记录。
+        """
+        import numpy as np
+
+        visible = self.visible_entries(min_accuracy, show_failed)
+        students = {}
+        for entry in np.flatnonzero(visible).tolist():
+            students[entry] = {
+                "name": self.names[self.entry_name[entry]],
+                "passed": [],
+                "failed": [],
+                "question_cards": {
+                    "SAT": [],
+                    "TOEFL": []
+                }
+            }
+
+        test_entry = np.frombuffer(self.test_entry, dtype=np.int32)
+        rows = np.flatnonzero(visible[test_entry] & (np.frombuffer(self.test_count, dtype=np.int64) >= 0))
+        columns = zip(
+            test_entry[rows].tolist(),
+            np.frombuffer(self.test_type, dtype=np.int8)[rows].tolist(),
+            np.frombuffer(self.test_range, dtype=np.int32)[rows].tolist(),
+            np.frombuffer(self.test_word_list, dtype=np.int32)[rows].tolist(),
+            np.frombuffer(self.test_count, dtype=np.int64)[rows].tolist(),
+            np.frombuffer(self.test_accuracy, dtype=np.int64)[rows].tolist(),
+            np.frombuffer(self.test_time, dtype=np.float64)[rows].tolist(),
+            np.frombuffer(self.test_errors, dtype=np.int64)[rows].tolist(),
+            self.failed_attempts(min_accuracy, failures, history)[rows].tolist(),
+        )
+        for entry, type_id, range_id, list_id, word_count, accuracy_val, reaction_time, errors, stars in columns:
+            test_data = {
+                "word_list": self.word_lists[list_id],
+                "type": TEST_TYPES[type_id],
+                "range": self.ranges[range_id],
+                "count": word_count,
+                "accuracy": accuracy_val,
+                "time": reaction_time,
+                "errors": errors,
+                "accuracy_str": f"{accuracy_val}%{'*' * stars}"
+            }
+            student_data = students[entry]
+            if accuracy_val >= min_accuracy:
+                student_data["passed"].append(test_data)
+            else:
+                student_data["failed"].append(test_data)
+
+        initial, corrected = self.card_accuracies()
+        card_entry = np.frombuffer(self.card_entry, dtype=np.int32)
+        rows = np.flatnonzero(visible[card_entry])
+        columns = zip(
+            card_entry[rows].tolist(),
+            np.frombuffer(self.card_type, dtype=np.int8)[rows].tolist(),
+            np.frombuffer(self.card_name, dtype=np.int32)[rows].tolist(),
+            np.frombuffer(self.card_wrong, dtype=np.int64)[rows].tolist(),
+            np.frombuffer(self.card_total, dtype=np.int64)[rows].tolist(),
+            initial[rows].tolist(),
+            np.frombuffer(self.card_corrected_wrong, dtype=np.int64)[rows].tolist(),
+            corrected[rows].tolist(),
+            np.frombuffer(self.card_status, dtype=np.int8)[rows].tolist(),
+        )
+        for entry, type_id, name_id, wrong, total, initial_accuracy, corrected_wrong, corrected_accuracy, status in columns:
+            students[entry]["question_cards"][CARD_TYPES[type_id]].append({
+                "name": self.card_names[name_id],
+                "initial_wrong": wrong,
+                "total": total,
+                "initial_accuracy": initial_accuracy,
+                "corrected_wrong": None if corrected_wrong < 0 else corrected_wrong,
+                "corrected_accuracy": None if corrected_wrong < 0 else corrected_accuracy,
+                "status": CARD_STATUSES[status]
+            })
+
+        return list(students.values())
+
+class ThresholdResults:
+    """所有分数线下的分析结果 - 分析时建一次未通过次数的前缀计数表，拖动分数线时只切片
+
+    每个分数线的 list-of-dicts 结果第一次用到时由 ResultStore.to_results 按列生成，
+    不再解析、不再汇总 history，之后在有界的 LRUCache 中复用。超出 MIN_ACCURACY_RANGE
+    的分数线不在表中，按同一份 history 重新计数。
+    """
+
+    def __init__(self, store, history=None, cache_entries=THRESHOLD_CACHE_ENTRIES):
+        self.store = store
+        self.history = history
+        self.failures = store.threshold_failures(history)
+        self._results = LRUCache(cache_entries)
+
+    def results(self, min_accuracy, show_failed=False):
+        """与 classify_entries(parsed, min_accuracy, show_failed, history) 相同的结果"""
+        key = (min_accuracy, show_failed)
+        results = self._results.get(key)
+        if results is None:
+            low, high = MIN_ACCURACY_RANGE
+            if low <= min_accuracy <= high:
+                results = self.store.to_results(min_accuracy, show_failed, self.failures)
+            else:
+                results = self.store.to_results(min_accuracy, show_failed, history=self.history)
+            self._results.put(key, results)
+        return results
+
+def parse_range(test_range):
+    """"2601~2700" -> (2601, 2700)，单个数字 n -> (n, n)，"未知范围" 返回 None"""
+    start, _, end = test_range.partition("~")
+    if not start.isdigit() or (end and not end.isdigit()):
+        return None
+    start = int(start)
+    end = int(end) if end else start
+    return (start, end) if start <= end else (end, start)
+
+def merge_intervals(intervals):
+    """合并重叠或首尾相接的整数闭区间，按起点排序返回"""
+    merged = []
+    for start, end in sorted(intervals):
+        if merged and start <= merged[-1][1] + 1:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    return [tuple(interval) for interval in merged]
+
+def format_intervals(intervals):
+    return "，".join(f"{start}~{end}" if start != end else str(start) for start, end in intervals)
+
+class CoverageIndex:
+    """已通过词测范围的区间索引 - 每个 (姓名, 词表, 测试类型) 一组合并后按起点排序的区间
+
+    不同词表的范围互不合并（SAT核心 1~100 和托福核心 101~200 不算覆盖了 1~200）；
+    同一学生的多个学生块合并统计。覆盖、缺口和重叠查询都是对起点/终点数组二分，
+    不做区间两两比较。"未知范围" 的词测不计入。
+    """
+
+    def __init__(self, intervals):
+        self._starts = {}
+        self._ends = {}
+        self.max_end = 0
+        for key, raw in intervals.items():
+            merged = merge_intervals(raw)
+            self._starts[key] = [start for start, _ in merged]
+            self._ends[key] = [end for _, end in merged]
+            self.max_end = max(self.max_end, self._ends[key][-1])
+
+    @classmethod
+    def from_results(cls, results):
+        """由 classify_entries 的结果构建，只统计通过的词测"""
+        intervals = defaultdict(list)
+        for student in results:
+            for test in student["passed"]:
+                interval = parse_range(test["range"])
+                if interval is not None:
+                    intervals[(student["name"], test["word_list"], test["type"])].append(interval)
+        return cls(intervals)
+
+    def keys(self):
+        """按首次出现的顺序返回所有 (姓名, 词表, 测试类型)"""
+        return list(self._starts)
+
+    def word_lists(self):
+        return sorted({word_list for _, word_list, _ in self._starts})
+
+    def coverage(self, key):
+        """key 为 (姓名, 词表, 测试类型)，返回合并后的已通过区间 [(起点, 终点), ...]"""
+        return list(zip(self._starts.get(key, ()), self._ends.get(key, ())))
+
+    def overlap(self, key, start, end):
+        """与目标范围 [start, end] 重叠的已通过区间（截取到目标范围内）"""
+        starts = self._starts.get(key, ())
+        ends = self._ends.get(key, ())
+        result = []
+        i = bisect_left(ends, start)
+        while i < len(starts) and starts[i] <= end:
+            result.append((max(starts[i], start), min(ends[i], end)))
+            i += 1
+        return result
+
+    def covered_words(self, key, start, end):
+        return sum(high - low + 1 for low, high in self.overlap(key, start, end))
+
+    def first_gap(self, key, start, end):
+        """目标范围 [start, end] 内第一个未通过的区间，全部覆盖时返回 None"""
+        starts = self._starts.get(key, ())
+        ends = self._ends.get(key, ())
+        i = bisect_right(starts, start) - 1
+        if i >= 0 and ends[i] >= start:
+            # start 已被覆盖；区间已合并，缺口从这一段的终点之后开始
+            start = ends[i] + 1
+            i += 1
+        else:
+            i += 1
+        if start > end:
+            return None
+        gap_end = end if i >= len(starts) else min(end, starts[i] - 1)
+        return start, gap_end
+
+def load_pinyin():
+    """可选依赖 pypinyin：安装了就支持按拼音全拼和首字母搜索姓名，否则返回 None"""
+    try:
+        from pypinyin import lazy_pinyin
+    except ImportError:
+        return None
+    return lazy_pinyin
+
+def search_grams(text):
+    """查询用的 n-gram：两个字符一组，单个字符时就是它本身"""
+    if len(text) < 2:
+        return {text}
+    return {text[i:i + 2] for i in range(len(text) - 1)}
+
+def index_grams(text):
+    """建索引用的 n-gram：单字符和两个字符的都要，单字符查询才能命中"""
+    return set(text) | search_grams(text)
+
+class ResultIndex:
+    """classify_entries 结果的倒排索引 - 每次分析构建一次，筛选时只做集合运算
+
+    不同的姓名（含拼音）和题卡名按单字符和 2-gram 建索引，候选再做一次子串校验后映射回学生；
+    词测记录按类型、通过/未通过和范围（整段及两端数字）建索引，命中的记录再映射回学生。
+    """
+
+    def __init__(self, results, pinyin=None):
+        if pinyin is None:
+            pinyin = load_pinyin()
+        self.size = len(results)
+        self.name_keys = []  # 每个不同姓名可被搜索的字符串：小写姓名、拼音全拼、拼音首字母
+        self.name_students = []
+        self.name_index = defaultdict(set)
+        self.test_student = []
+        self.test_index = defaultdict(set)  # ("type", 听测) / ("status", passed) / ("range", 2601) -> 词测记录
+        self.card_keys = []  # 每个不同题卡的 (小写的 "题卡类型 题卡名",)
+        self.card_students = []
+        self.card_index = defaultdict(set)
+
+        name_ids = {}
+        card_ids = {}
+        range_tokens = {}
+
+        for student_id, student in enumerate(results):
+            name = student["name"]
+            name_id = name_ids.get(name)
+            if name_id is None:
+                name_id = name_ids[name] = len(self.name_keys)
+                keys = [name.lower()]
+                if pinyin is not None:
+                    syllables = pinyin(name)
+                    keys.append("".join(syllables).lower())
+                    keys.append("".join(syllable[:1] for syllable in syllables).lower())
+                self.name_keys.append(keys)
+                self.name_students.append([])
+                for gram in set().union(*map(index_grams, keys)):
+                    self.name_index[gram].add(name_id)
+            self.name_students[name_id].append(student_id)
+
+            for status in ("passed", "failed"):
+                for test in student[status]:
+                    record = len(self.test_student)
+                    self.test_student.append(student_id)
+                    self.test_index[("type", test["type"])].add(record)
+                    self.test_index[("status", status)].add(record)
+                    test_range = test["range"]
+                    if test_range not in range_tokens:
+                        range_tokens[test_range] = {test_range, *test_range.split("~")}
+                    for token in range_tokens[test_range]:
+                        self.test_index[("range", token)].add(record)
+
+            for card_type in CARD_TYPES:
+                for card in student["question_cards"][card_type]:
+                    key = f"{card_type} {card['name']}".lower()
+                    card_id = card_ids.get(key)
+                    if card_id is None:
+                        card_id = card_ids[key] = len(self.card_keys)
+                        self.card_keys.append((key,))
+                        self.card_students.append([])
+                        for gram in index_grams(key):
+                            self.card_index[gram].add(card_id)
+                    self.card_students[card_id].append(student_id)
+
+    @staticmethod
+    def _substring(index, keys, students, query):
+        """n-gram 求交得到候选，校验 query 确实是子串后返回对应的学生"""
+        postings = sorted((index.get(gram, set()) for gram in search_grams(query)), key=len)
+        candidates = set.intersection(*postings) if postings else set()
+        matches = set()
+        for i in candidates:
+            if any(query in key for key in keys[i]):
+                matches.update(students[i])
+        return matches
+
+    def search(self, name="", test_type=None, test_range="", status=None, card=""):
+        """返回同时满足全部条件的学生序号（升序）；空条件不限
+
+        test_type 为 "听测"/"看测"，status 为 "passed"/"failed"，test_range 为完整范围
+        （如 "2601~2700"）或其中一端的数字；三者需由同一条词测记录满足。
+        """
+        matches = None
+        name = name.strip().lower()
+        if name:
+            matches = self._substring(self.name_index, self.name_keys, self.name_students, name)
+
+        conditions = [("type", test_type), ("status", status), ("range", test_range.strip())]
+        postings = [self.test_index.get(condition, set()) for condition in conditions if condition[1]]
+        if postings:
+            records = set.intersection(*sorted(postings, key=len))
+            students = {self.test_student[record] for record in records}
+            matches = students if matches is None else matches & students
+
+        card = card.strip().lower()
+        if card:
+            students = self._substring(self.card_index, self.card_keys, self.card_students, card)
+            matches = students if matches is None else matches & students
+
+        return list(range(self.size)) if matches is None else sorted(matches)
+
+DIFF_COLUMNS = ("姓名", "变化", "类型", "项目", "之前", "之后")
+DIFF_KINDS = ("新通过", "新未通过", "成绩提高", "题卡完成", "题卡订正")  # 对比结果中变化类型的显示顺序
+
+def test_outcomes(parsed, min_accuracy):
+    """{(姓名, 测试类型, 范围): [最高正确率, 最短反应时间, 未通过次数]}，只统计字段完整的词测"""
+    summary = {}
+    for full_name, tests, _ in parsed:
+        for test_type, test_range, accuracy, word_count, reaction_time, *_ in tests:
+            if word_count is None:
+                continue
+            key = (full_name, test_type, test_range)
+            entry = summary.get(key)
+            if entry is None:
+                summary[key] = [accuracy, reaction_time, int(accuracy < min_accuracy)]
+            else:
+                if accuracy > entry[0]:
+                    entry[0] = accuracy
+                if reaction_time < entry[1]:
+                    entry[1] = reaction_time
+                entry[2] += accuracy < min_accuracy
+    return summary
+
+def card_outcomes(parsed):
+    """{(姓名, 题卡类型, 题卡名称): [是否已完成, 最少订正后错误数或 None, 总题数]}"""
+    summary = {}
+    for full_name, _, cards in parsed:
+        for card_type, card in cards:
+            key = (full_name, card_type, card["name"])
+            completed = card["status"] == "已完成"
+            corrected = card["corrected_wrong"]
+            entry = summary.get(key)
+            if entry is None:
+                summary[key] = [completed, corrected, card["total"]]
+            else:
+                entry[0] = entry[0] or completed
+                if corrected is not None and (entry[1] is None or corrected < entry[1]):
+                    entry[1] = corrected
+    return summary
+
+def attempt_str(entry):
+    return f"{entry[0]}% / {entry[1]:.2f}s"
+
+def diff_parsed(before, after, min_accuracy=94):
+    """两次分析之间每个学生的变化 - 返回 DIFF_COLUMNS 为键的行，按 after 中学生出现的顺序
+
+    两边先各自按 (姓名, 类型, 范围) 和 (姓名, 题卡类型, 题卡名称) 汇总成字典，再按 key 做一次哈希连接，
+    耗时与记录数成线性。词测按最高正确率判断是否通过：之前没通过、现在通过为 "新通过"；
+    未通过次数增加为 "新未通过"，与是否已经通过无关（追加粘贴时已通过范围上的新失败也要报告），
+    同一范围可以同时有这两行；两者都没有时最高正确率提高或最短反应时间缩短为 "成绩提高"。
+    题卡变为已完成为 "题卡完成"，出现订正或订正后错误数减少为 "题卡订正"。
+    """
+    old_tests = test_outcomes(before, min_accuracy)
+    old_cards = card_outcomes(before)
+    changes = defaultdict(list)
+
+    for (full_name, test_type, test_range), new in test_outcomes(after, min_accuracy).items():
+        old = old_tests.get((full_name, test_type, test_range))
+        kinds = []
+        if new[0] >= min_accuracy and (old is None or old[0] < min_accuracy):
+            kinds.append("新通过")
+        if new[2] > (0 if old is None else old[2]):
+            kinds.append("新未通过")
+        if not kinds and old is not None and (new[0] > old[0] or new[1] < old[1]):
+            kinds.append("成绩提高")
+        for kind in kinds:
+            before_str = "-" if old is None else attempt_str(old)
+            after_str = attempt_str(new)
+            if kind == "新未通过":
+                before_str = "-" if old is None else f"{before_str}，未通过 {old[2]} 次"
+                after_str = f"{after_str}，未通过 {new[2]} 次"
+            changes[full_name].append({
+                "姓名": full_name, "变化": kind, "类型": test_type, "项目": test_range,
+                "之前": before_str, "之后": after_str
+            })
+
+    for (full_name, card_type, name), new in card_outcomes(after).items():
+        old = old_cards.get((full_name, card_type, name))
+        if new[0] and (old is None or not old[0]):
+            changes[full_name].append({
+                "姓名": full_name, "变化": "题卡完成", "类型": card_type, "项目": name,
+                "之前": "-" if old is None else "正在进行", "之后": "已完成"
+            })
+        if new[1] is not None and (old is None or old[1] is None or new[1] < old[1]):
+            changes[full_name].append({
+                "姓名": full_name, "变化": "题卡订正", "类型": card_type, "项目": name,
+                "之前": "-" if old is None or old[1] is None else f"{old[1]}/{old[2]}", "之后": f"{new[1]}/{new[2]}"
+            })
+
+    return [row for rows in changes.values() for row in rows]
+
+def diff_counts(diff):
+    """每种变化的条数和涉及的学生数：{变化: (条数, 学生数)}，按 DIFF_KINDS 顺序"""
+    rows = Counter(row["变化"] for row in diff)
+    students = Counter(kind for kind, _ in {(row["变化"], row["姓名"]) for row in diff})
+    return {kind: (rows[kind], students[kind]) for kind in DIFF_KINDS}
+
+def write_diff_csv(diff, stream):
+    """把 diff_parsed 的结果写成 Excel 兼容的 CSV (utf-8-sig)"""
+    import csv
+
+    text = io.TextIOWrapper(stream, encoding="utf-8-sig", newline="")
+    writer = csv.DictWriter(text, DIFF_COLUMNS, lineterminator="\n")
+    writer.writeheader()
+    writer.writerows(diff)
+    text.flush()
+    text.detach()
+
+def export_diff_bytes(diff):
+    buffer = io.BytesIO()
+    write_diff_csv(diff, buffer)
+    return buffer.getvalue()
+
+def hash_text(text):
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+def hash_bytes(data):
+    return hashlib.sha1(data).hexdigest()
+
+class HistoryStore:
+    """SQLite 词测历史库 - 让重试 * 号统计到以前粘贴过的记录
+
+    每次尝试按 (姓名, 类型, 范围, 正确率, 词数, 反应时间, 错误数) 及它是本次粘贴中该学生第几条
+    完全相同的记录生成指纹作主键：重复导入的记录会被忽略，同一次粘贴里真实的重复尝试则都保留。
+    (姓名, 类型, 范围, 正确率) 上有覆盖索引。
+    """
+
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS attempts (
+        fingerprint BLOB PRIMARY KEY,
+        student TEXT NOT NULL,
+        test_type TEXT NOT NULL,
+        test_range TEXT NOT NULL,
+        accuracy INTEGER NOT NULL,
+        ingested_at REAL NOT NULL
+    ) WITHOUT ROWID;
+    CREATE INDEX IF NOT EXISTS attempts_key ON attempts (student, test_type, test_range, accuracy);
+    """
+
+    def __init__(self, path):
+        import sqlite3
+
+        self.path = path
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            self._conn.executescript(self.SCHEMA)
+
+    @staticmethod
+    def fingerprint(full_name, test, occurrence=1):
+        """occurrence 为同一学生相同记录的序号，第一条的指纹与旧版本一致，已有的历史库不会重复计数
+
+        只用前六个字段（不含词表），与加入词表之前导入的记录指纹相同。
+        """
+        fields = (full_name,) + tuple(test[:6]) + ((occurrence,) if occurrence > 1 else ())
+        return hashlib.sha1("\x1f".join(map(str, fields)).encode("utf-8")).digest()
+
+    def ingest(self, parsed):
+        """写入已解析的学生块，返回新增的记录数"""
+        now = time.time()
+        occurrences = Counter()
+
+        def rows():
+            for full_name, tests, _ in parsed:
+                for test in tests:
+                    # 与指纹使用相同的字段：不同词表中字段相同的记录也要按序号区分
+                    key = (full_name, test[:6])
+                    occurrences[key] += 1
+                    fingerprint = self.fingerprint(full_name, test, occurrences[key])
+                    yield fingerprint, full_name, test[0], test[1], test[2], now
+
+        with self._lock, self._conn:
+            before = self._conn.total_changes
+            self._conn.executemany("INSERT OR IGNORE INTO attempts VALUES (?, ?, ?, ?, ?, ?)", rows())
+            return self._conn.total_changes - before
+
+    def history(self, keys):
+        """返回 {(姓名, 类型, 范围): [正确率, ...]}，只查询给定的 key"""
+        return self.snapshot(keys)[1]
+
+    def snapshot(self, keys):
+        """返回 (版本, history)，两者在同一把锁内读取
+
+        记录只增不减，版本即记录总数：内容变化时版本一定变化，可用作按历史库结果缓存的 key。
+        """
+        history = {key: [] for key in keys}
+        with self._lock, self._conn:
+            version = self._conn.execute("SELECT COUNT(*) FROM attempts").fetchone()[0]
+            # key 先写入临时表再一次 JOIN，不为每个 key 单独查询
+            self._conn.execute(
+                "CREATE TEMP TABLE IF NOT EXISTS snapshot_keys (student TEXT, test_type TEXT, test_range TEXT)"
+            )
+            self._conn.execute("DELETE FROM snapshot_keys")
+            self._conn.executemany("INSERT INTO snapshot_keys VALUES (?, ?, ?)", history)
+            rows = self._conn.execute(
+                "SELECT k.student, k.test_type, k.test_range, a.accuracy FROM snapshot_keys AS k "
+                "JOIN attempts AS a ON a.student = k.student AND a.test_type = k.test_type "
+                "AND a.test_range = k.test_range"
+            )
+            for student, test_type, test_range, accuracy in rows:
+                history[(student, test_type, test_range)].append(accuracy)
+            self._conn.execute("DELETE FROM snapshot_keys")
+        return version, history
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM attempts").fetchone()[0]
+
+    def close(self):
+        self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+EXPORT_COLUMNS = (
+    "姓名", "类型",
+    "测试类型", "测试范围", "词数", "正确率", "反应时间", "错误数",
+    "题卡类型", "题卡名称", "状态", "总题数", "初次错误数", "初次正确率", "订正后错误数", "订正后正确率"
+)
+COVERAGE_COLUMNS = ("姓名", "词表", "测试类型", "起点", "终点", "词数")
+EXPORT_BATCH_ROWS = 10000  # Parquet 每个 row group 的行数
+
+def iter_export_rows(results):
+    """按学生顺序逐行产出导出记录 - EXPORT_COLUMNS 顺序的元组，不适用的列为 None"""
+    for student in results:
+        name = student['name']
+        for test in student['passed'] + student['failed']:
+            yield (name, "词测", test["type"], test["range"], test["count"], test["accuracy"],
+                   test["time"], test["errors"], None, None, None, None, None, None, None, None)
+
+        for card_type in CARD_TYPES:
+            for card in student['question_cards'][card_type]:
+                yield (name, "题卡", None, None, None, None, None, None, card_type, card['name'],
+                       card['status'], card['total'], card['initial_wrong'], card['initial_accuracy'],
+                       card['corrected_wrong'], card['corrected_accuracy'])
+
+def iter_coverage_rows(results):
+    """合并后的已通过范围，每个区间一行 - COVERAGE_COLUMNS 顺序的元组
+
+    与词测/题卡记录分开导出（单独的 CSV 或 XLSX 的单独工作表），不影响按记录的统计。
+    """
+    coverage = CoverageIndex.from_results(results)
+    for key in coverage.keys():
+        for start, end in coverage.coverage(key):
+            yield key + (start, end, end - start + 1)
+
+def write_coverage_csv(results, stream):
+    """把已通过范围写成单独的 Excel 兼容 CSV (utf-8-sig)"""
+    import csv
+
+    text = io.TextIOWrapper(stream, encoding="utf-8-sig", newline="")
+    writer = csv.writer(text, lineterminator="\n")
+    writer.writerow(COVERAGE_COLUMNS)
+    writer.writerows(iter_coverage_rows(results))
+    text.flush()
+    text.detach()
+
+def write_csv(results, stream):
+    """逐行写出 Excel 兼容的 CSV (utf-8-sig)；题卡没有订正时订正列写 N/A"""
+    import csv
+
+    text = io.TextIOWrapper(stream, encoding="utf-8-sig", newline="")
+    writer = csv.writer(text, lineterminator="\n")
+    writer.writerow(EXPORT_COLUMNS)
+    for row in iter_export_rows(results):
+        if row[1] == "题卡" and row[14] is None:
+            row = row[:14] + ("N/A", "N/A")
+        writer.writerow(row)
+    text.flush()
+    text.detach()
+
+def write_parquet(results, stream):
+    """按 EXPORT_BATCH_ROWS 行一组写出带类型的 Parquet，需要 pyarrow"""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    types = {
+        "词数": pa.int64(), "正确率": pa.int64(), "反应时间": pa.float64(), "错误数": pa.int64(),
+        "总题数": pa.int64(), "初次错误数": pa.int64(), "初次正确率": pa.int64(),
+        "订正后错误数": pa.int64(), "订正后正确率": pa.int64()
+    }
+    schema = pa.schema([(column, types.get(column, pa.string())) for column in EXPORT_COLUMNS])
+
+    def write_batch(writer, rows):
+        columns = list(zip(*rows))
+        writer.write_table(pa.Table.from_arrays(
+            [pa.array(values, type=field.type) for values, field in zip(columns, schema)],
+            schema=schema
+        ))
+
+    with pq.ParquetWriter(stream, schema) as writer:
+        rows = []
+        for row in iter_export_rows(results):
+            rows.append(row)
+            if len(rows) >= EXPORT_BATCH_ROWS:
+                write_batch(writer, rows)
+                rows = []
+        if rows:
+            write_batch(writer, rows)
+
+def write_xlsx(results, stream):
+    """用 openpyxl 的 write-only 模式逐行写出 XLSX，已通过范围单独放在 "覆盖范围" 工作表"""
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet("词测分析结果")
+    sheet.append(EXPORT_COLUMNS)
+    for row in iter_export_rows(results):
+        sheet.append(row)
+    sheet = workbook.create_sheet("覆盖范围")
+    sheet.append(COVERAGE_COLUMNS)
+    for row in iter_coverage_rows(results):
+        sheet.append(row)
+    workbook.save(stream)
+
+REPORT_TEMPLATE = """<!DOCTYPE html>
+<html lang="zh-CN">
+<head>
+<meta charset="utf-8">
+<meta name="viewport" content="width=device-width, initial-scale=1">
+<title>{title}</title>
+<style>
+body {{ font-family: "Google Sans", Roboto, "PingFang SC", "Microsoft YaHei", sans-serif; color: #202124;
+       background: #f8f9fa; max-width: 1100px; margin: 0 auto; padding: 24px; }}
+h1 {{ font-weight: 500; }}
+.student {{ background: #fff; border-radius: 8px; box-shadow: 0 1px 2px rgba(60,64,67,.3); padding: 16px 20px;
+           margin-bottom: 16px; }}
+.student h2 {{ margin: 0 0 8px; font-size: 1.25rem; font-weight: 500; }}
+.passed {{ color: #34A853; }} .failed {{ color: #EA4335; }}
+h3 {{ font-size: 1rem; font-weight: 500; margin: 12px 0 6px; }}
+table {{ border-collapse: collapse; width: 100%; font-size: .9rem; }}
+th, td {{ text-align: left; padding: 6px 8px; border-bottom: 1px solid #dadce0; }}
+th {{ color: #5f6368; font-weight: 500; }}
+.bar {{ background: #e8eaed; border-radius: 4px; height: 8px; width: 120px; }}
+.bar span {{ display: block; height: 8px; border-radius: 4px; background: #4285F4; }}
+.card {{ border-left: 4px solid; border-radius: 4px; background: #f8f9fa; padding: 8px 12px; margin: 6px 0; }}
+.sat {{ border-color: #FBBC05; background: rgba(251,188,5,.05); }}
+.toefl {{ border-color: #EA4335; background: rgba(234,67,53,.05); }}
+.meta {{ color: #5f6368; }}
+</style>
+</head>
+<body>
+<h1>{title}</h1>
+<p class="meta">共 {students} 名学生。正确率后的 * 号表示之前未通过的次数。</p>
+"""
+
+def report_test_rows(tests, escape):
+    for test in tests:
+        yield (f"<tr><td>{test['type']}</td><td>{escape(test['range'])}</td><td>{test['count']}</td>"
+               f"<td>{test['accuracy_str']}</td><td><div class=\"bar\"><span style=\"width:{test['accuracy']}%\"></span>"
+               f"</div></td><td>{test['time']:.2f}s</td><td>{test['errors']}</td></tr>")
+
+def write_html(results, stream, title="词测分析结果"):
+    """把全部结果渲染为一个独立的 HTML 报告（内容同页面上的词测表格和题卡），逐个学生写出"""
+    from html import escape
+
+    text = io.TextIOWrapper(stream, encoding="utf-8", newline="")
+    text.write(REPORT_TEMPLATE.format(title=escape(title), students=len(results)))
+    header = "<tr><th>测试类型</th><th>范围</th><th>词数</th><th>正确率(带重试)</th><th>正确率进度</th><th>反应时间</th><th>错误数</th></tr>"
+
+    for student in results:
+        parts = [f"<section class=\"student\"><h2>👤 {escape(student['name'])}</h2>"]
+        for key, label in (("passed", "通过测试"), ("failed", "未通过测试")):
+            if student[key]:
+                parts.append(f"<h3 class=\"{key}\">{label}</h3><table>{header}")
+                parts.extend(report_test_rows(student[key], escape))
+                parts.append("</table>")
+        for card_type in CARD_TYPES:
+            cards = student["question_cards"][card_type]
+            if cards:
+                parts.append(f"<h3>📋 {card_type}题卡</h3>")
+            for card in cards:
+                parts.append(
+                    f"<div class=\"card {card_type.lower()}\"><b>{escape(card['name'])}</b> - {card['status']}<br>"
+                    f"初次错题: {card['initial_wrong']}/{card['total']} (正确率: {card['initial_accuracy']}%)"
+                )
+                if card["corrected_wrong"] is not None:
+                    parts.append(f"<br>订正后错题: {card['corrected_wrong']}/{card['total']} "
+                                 f"(正确率: {card['corrected_accuracy']}%)")
+                parts.append("</div>")
+        parts.append("</section>\n")
+        text.write("".join(parts))
+
+    text.write("</body>\n</html>\n")
+    text.flush()
+    text.detach()
+
+EXPORT_WRITERS = {
+    "csv": write_csv,
+    "parquet": write_parquet,
+    "xlsx": write_xlsx,
+    "html": write_html
+}
+
+def export_coverage_bytes(results):
+    buffer = io.BytesIO()
+    write_coverage_csv(results, buffer)
+    return buffer.getvalue()
+
+def export_bytes(results, fmt):
+    """把结果导出为 csv / parquet / xlsx / html 格式的字节串"""
+    buffer = io.BytesIO()
+    EXPORT_WRITERS[fmt](results, buffer)
+    return buffer.getvalue()